@@ -8,11 +8,15 @@ from types import TracebackType
 from typing import Any, Callable, Optional, Union, Type
 
 import requests
+from requests.adapters import HTTPAdapter
 
 CALLBACK_TYPE = Callable[[dict, "Request"], Any]
 ON_FAILED_TYPE = Callable[[int, "Request"], Any]
 ON_ERROR_TYPE = Callable[[Type, Exception, TracebackType, "Request"], Any]
 
+# keep-alive connections kept per host by each session
+POOL_SIZE = 10
+
 
 class RequestStatus(Enum):
     ready = 0
@@ -82,31 +86,53 @@ class RestClient(object):
 
         self._queue: Queue = Queue()
         self._pool: Pool = None
+        self._session: requests.Session = None
 
         self.proxies: dict = None
+        self.pool_size: int = POOL_SIZE
 
     def init(
             self,
             url_base: str,
             proxy_host: str = "",
-            proxy_port: int = 0
+            proxy_port: int = 0,
+            pool_size: int = POOL_SIZE
     ) -> None:
         # API root address
         self.url_base: str = url_base
+        self.pool_size = pool_size
 
         if proxy_host and proxy_port:
             proxy = f"http://{proxy_host}:{proxy_port}"
             self.proxies = {"http": proxy, "https": proxy}
 
+        # shared by the blocking request(), which may be called from many threads
+        self._session = self.new_session()
+
+    def new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
     def start(self, n: int = 3) -> None:
+        # ```
+        # Start n workers taking requests from the queue concurrently, each
+        # with its own keep-alive session, so callbacks of different
+        # requests may run at the same time and finish in any order.
+        # ```
         if self._active:
             return
 
         self._active = True
         self._pool: Pool = Pool(n)
-        self._pool.apply_async(self._run)
+        for _ in range(n):
+            self._pool.apply_async(self._run)
+        self._pool.close()
 
     def stop(self) -> None:
+        # workers leave within a second and close their sessions
         self._active = False
 
     def join(self) -> None:
@@ -140,8 +166,8 @@ class RestClient(object):
         return request
 
     def _run(self) -> None:
+        session = self.new_session()
         try:
-            session = requests.session()
             while self._active:
                 try:
                     request = self._queue.get(timeout=1)
@@ -153,7 +179,9 @@ class RestClient(object):
                     pass
         except Exception:
             et, ev, tb = sys.exc_info()
-            self.on_error(et, ev, tb)
+            self.on_error(et, ev, tb, None)
+        finally:
+            session.close()
 
     def sign(self, request: Request) -> Request:
         return request
@@ -255,7 +283,9 @@ class RestClient(object):
 
         url = self.make_full_url(request.path)
 
-        response = requests.request(
+        if not self._session:
+            self._session = self.new_session()
+        response = self._session.request(
             request.method,
             url,
             headers=request.headers,
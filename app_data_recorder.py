@@ -2,12 +2,13 @@ import sys
 from copy import copy
 from queue import Queue, Empty
 from threading import Thread
+from typing import List
 
 from event_engine import EventEngine, Event
 from trader_constant import Exchange
 from trader_engine import MainEngine
 from trader_engine_base import BaseEngine
-from trader_event import EVENT_TICK, EVENT_CONTRACT
+from trader_event import EVENT_TICK, EVENT_CONTRACT, EVENT_CONTRACTS
 from trader_object import ContractData, TickData, SubscribeRequest, BarData
 
 APP_NAME = "DataRecorder"
@@ -57,7 +58,7 @@ class RecorderEngine(BaseEngine):
                 task_type, data = task
 
                 if task_type == "tick":
-                    database_manager.save_tick_data([data])
+                    database_manager.save_tick_data(data)
                 elif task_type == "bar":
                     database_manager.save_bar_data([data])
             except Empty:
@@ -147,8 +148,9 @@ class RecorderEngine(BaseEngine):
         self.write_log(f"移除Tick记录成功：{vt_symbol}")
 
     def register_event(self):
-        self.event_engine.register(EVENT_TICK, self.process_tick_event)
+        self.event_engine.register_batch(EVENT_TICK, self.process_tick_events)
         self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
+        self.event_engine.register(EVENT_CONTRACTS, self.process_contracts_event)
         self.event_engine.register(EVENT_SPREAD_DATA, self.process_spread_event)
 
     def update_tick(self, tick: TickData):
@@ -159,9 +161,20 @@ class RecorderEngine(BaseEngine):
             bg = self.get_bar_generator(tick.vt_symbol)
             bg.update_tick(tick)
 
-    def process_tick_event(self, event: Event):
-        tick: TickData = event.data
-        self.update_tick(tick)
+    def process_tick_events(self, events: List[Event]):
+        # record the whole batch with one database task
+        ticks = []
+        for event in events:
+            tick: TickData = event.data
+            if tick.vt_symbol in self.tick_recording:
+                ticks.append(copy(tick))
+
+            if tick.vt_symbol in self.bar_recordings:
+                bg = self.get_bar_generator(tick.vt_symbol)
+                bg.update_tick(tick)
+
+        if ticks:
+            self.queue.put(("tick", ticks))
 
     def process_contract_event(self, event: Event):
         contract: ContractData = event.data
@@ -170,6 +183,14 @@ class RecorderEngine(BaseEngine):
         if vt_symbol in self.tick_recording or vt_symbol in self.bar_recordings:
             self.subscribe(contract)
 
+    def process_contracts_event(self, event: Event):
+        contracts: List[ContractData] = event.data
+
+        for contract in contracts:
+            vt_symbol = contract.vt_symbol
+            if vt_symbol in self.tick_recording or vt_symbol in self.bar_recordings:
+                self.subscribe(contract)
+
     def process_spread_event(self, event: Event):
         spread: SpreadData = event.data
         tick: TickData = spread.to_tick()
@@ -202,7 +223,7 @@ class RecorderEngine(BaseEngine):
         self.event_engine.put(event)
 
     def record_tick(self, tick: TickData):
-        task = ("tick", copy(tick))
+        task = ("tick", [copy(tick)])
         self.queue.put(task)
 
     def record_bar(self, bar: BarData):
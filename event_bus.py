@@ -0,0 +1,329 @@
+import os
+import pickle
+import struct
+from itertools import count
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from threading import Lock, Thread
+from time import monotonic, sleep
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from event_engine import Event, EventEngine
+from trader_event import EVENT_TICK, EVENT_ORDER, EVENT_TRADE
+from trader_codec import decode_data, encode_data
+from trader_object import CancelRequest, OrderRequest
+from trader_setting import SETTINGS
+
+EVENT_BUS_REPLY = "eBusReply"
+
+BUS_TYPES = (EVENT_TICK, EVENT_ORDER, EVENT_TRADE)
+BUS_SIZE = 16 * 1024 * 1024
+
+# ring header: capacity, write position, read position, pid of the
+# creating process; positions only grow
+CAPACITY = struct.Struct("<Q")
+POSITION = struct.Struct("<Q")
+WRITE_OFFSET = 8
+READ_OFFSET = 16
+OWNER_OFFSET = 24
+DATA_OFFSET = 32
+
+FRAME = struct.Struct("<I")
+WRAP = 0xFFFFFFFF
+
+# event frame: length of the type, type, data
+EVENT_TYPE = struct.Struct("<H")
+
+REQUEST_SEND = 1
+REQUEST_CANCEL = 2
+
+
+def process_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        # blocks go away with the last process holding them there
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def create_shared_memory(name: str, size: int) -> SharedMemory:
+    # ```
+    # Create the block, first unlinking one with the same name left behind
+    # by a creator that is no longer running. A block whose creator still
+    # runs, e.g. another server with the same name, raises FileExistsError.
+    # ```
+    try:
+        return SharedMemory(name=name, create=True, size=size)
+    except FileExistsError:
+        pass
+
+    stale = SharedMemory(name=name)
+    owner = POSITION.unpack_from(stale.buf, OWNER_OFFSET)[0] if stale.size >= DATA_OFFSET else 0
+    stale.close()
+    if process_alive(owner):
+        resource_tracker.unregister(stale._name, "shared_memory")
+        raise FileExistsError(f"shared memory {name} is in use by process {owner}")
+
+    stale.unlink()
+    return SharedMemory(name=name, create=True, size=size)
+
+
+def encode_event(event: Event) -> bytes:
+    type = event.type.encode("utf8")
+    return EVENT_TYPE.pack(len(type)) + type + encode_data(event.data)
+
+
+def decode_event(payload: bytes) -> Event:
+    view = memoryview(payload)
+    start = EVENT_TYPE.size + EVENT_TYPE.unpack_from(view, 0)[0]
+    return Event(str(view[EVENT_TYPE.size:start], "utf8"), decode_data(view[start:]))
+
+
+class SharedRingBuffer:
+    # ```
+    # Single producer / single consumer ring of length-prefixed frames in a
+    # named shared memory block. The producer only moves the write position
+    # and the consumer only the read position, so no lock is shared between
+    # processes. A frame that does not fit before the end of the ring is
+    # written from the start, after a WRAP marker.
+    # ```
+    def __init__(self, name: str, size: int = BUS_SIZE, create: bool = False):
+        self.name: str = name
+        self.owner: bool = create
+
+        if create:
+            self._shm = create_shared_memory(name, DATA_OFFSET + size)
+            CAPACITY.pack_into(self._shm.buf, 0, size)
+            POSITION.pack_into(self._shm.buf, WRITE_OFFSET, 0)
+            POSITION.pack_into(self._shm.buf, READ_OFFSET, 0)
+            POSITION.pack_into(self._shm.buf, OWNER_OFFSET, os.getpid())
+        else:
+            self._shm = SharedMemory(name=name)
+            # only the creating process may unlink the block
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+
+        self._buf = self._shm.buf
+        self.capacity: int = CAPACITY.unpack_from(self._buf, 0)[0]
+
+    def write(self, payload: bytes) -> bool:
+        # return False if the consumer is too far behind to fit the frame
+        buf = self._buf
+        capacity = self.capacity
+        need = FRAME.size + len(payload)
+        if need > capacity:
+            raise ValueError(f"frame of {need} bytes exceeds ring capacity {capacity}")
+
+        write_pos = POSITION.unpack_from(buf, WRITE_OFFSET)[0]
+        read_pos = POSITION.unpack_from(buf, READ_OFFSET)[0]
+
+        offset = write_pos % capacity
+        tail = capacity - offset
+        skip = tail if tail < need else 0
+        if write_pos + skip + need - read_pos > capacity:
+            return False
+
+        if skip:
+            if tail >= FRAME.size:
+                FRAME.pack_into(buf, DATA_OFFSET + offset, WRAP)
+            write_pos += skip
+            offset = 0
+
+        start = DATA_OFFSET + offset
+        FRAME.pack_into(buf, start, len(payload))
+        buf[start + FRAME.size:start + need] = payload
+        POSITION.pack_into(buf, WRITE_OFFSET, write_pos + need)
+        return True
+
+    def read(self) -> Optional[bytes]:
+        buf = self._buf
+        capacity = self.capacity
+
+        write_pos = POSITION.unpack_from(buf, WRITE_OFFSET)[0]
+        read_pos = POSITION.unpack_from(buf, READ_OFFSET)[0]
+        if read_pos == write_pos:
+            return None
+
+        offset = read_pos % capacity
+        tail = capacity - offset
+        if tail < FRAME.size:
+            read_pos += tail
+            offset = 0
+        else:
+            length = FRAME.unpack_from(buf, DATA_OFFSET + offset)[0]
+            if length == WRAP:
+                read_pos += tail
+                offset = 0
+
+        start = DATA_OFFSET + offset
+        length = FRAME.unpack_from(buf, start)[0]
+        payload = bytes(buf[start + FRAME.size:start + FRAME.size + length])
+        POSITION.pack_into(buf, READ_OFFSET, read_pos + FRAME.size + length)
+        return payload
+
+    def close(self) -> None:
+        self._buf = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+class EventBusServer:
+    # ```
+    # Runs in the MainEngine process: mirrors the selected event types into
+    # a shared memory ring for one strategy process, and executes the order
+    # requests that process writes into a second ring. Servers on one host
+    # need different names, the default is the bus.name setting.
+    # ```
+    def __init__(
+            self,
+            main_engine: Any,
+            event_engine: EventEngine,
+            name: str = "",
+            types: Iterable[str] = BUS_TYPES,
+            size: int = BUS_SIZE,
+            encode: Callable[[Event], bytes] = encode_event
+    ):
+        self.main_engine = main_engine
+        self.event_engine: EventEngine = event_engine
+        self.types: Tuple[str, ...] = tuple(types)
+        self.encode: Callable[[Event], bytes] = encode
+
+        name = name or SETTINGS["bus.name"]
+        self.event_ring: SharedRingBuffer = SharedRingBuffer(f"{name}_event", size, create=True)
+        try:
+            self.request_ring: SharedRingBuffer = SharedRingBuffer(f"{name}_request", size, create=True)
+        except FileExistsError:
+            self.event_ring.close()
+            raise
+        self.event_lock: Lock = Lock()
+        self.dropped: int = 0
+
+        self.active: bool = False
+        self.thread: Thread = Thread(target=self.run)
+
+    def start(self) -> None:
+        for type in self.types:
+            self.event_engine.register(type, self.process_event)
+
+        self.active = True
+        self.thread.start()
+
+    def close(self) -> None:
+        for type in self.types:
+            self.event_engine.unregister(type, self.process_event)
+
+        self.active = False
+        if self.thread.is_alive():
+            self.thread.join()
+
+        self.event_ring.close()
+        self.request_ring.close()
+
+    def process_event(self, event: Event) -> None:
+        self.write_event(event)
+
+    def write_event(self, event: Event) -> None:
+        # the ring has one producer, but sharded workers and the request
+        # thread may both publish
+        payload = self.encode(event)
+        with self.event_lock:
+            if not self.event_ring.write(payload):
+                self.dropped += 1
+
+    def run(self) -> None:
+        idle = 0
+        while self.active:
+            payload = self.request_ring.read()
+            if payload is None:
+                idle = min(idle + 1, 10)
+                sleep(0.0001 * idle)
+                continue
+
+            idle = 0
+            self.process_request(pickle.loads(payload))
+
+    def process_request(self, request: tuple) -> None:
+        kind, request_id, req, gateway_name = request
+
+        if kind == REQUEST_SEND:
+            vt_orderid = self.main_engine.send_order(req, gateway_name)
+            self.write_event(Event(EVENT_BUS_REPLY, (request_id, vt_orderid)))
+        elif kind == REQUEST_CANCEL:
+            self.main_engine.cancel_order(req, gateway_name)
+
+
+class EventBusClient:
+    # ```
+    # Runs in a strategy process: reads mirrored events from the bus and
+    # routes send_order/cancel_order back to the MainEngine process.
+    # send_order returns a request id, the vt_orderid arrives later as an
+    # EVENT_BUS_REPLY event with data (request_id, vt_orderid).
+    # ```
+    def __init__(self, name: str = "", decode: Callable[[bytes], Event] = decode_event):
+        self.decode: Callable[[bytes], Event] = decode
+
+        name = name or SETTINGS["bus.name"]
+        self.event_ring: SharedRingBuffer = SharedRingBuffer(f"{name}_event")
+        self.request_ring: SharedRingBuffer = SharedRingBuffer(f"{name}_request")
+        self.request_lock: Lock = Lock()
+        self.request_ids = count(1)
+
+        self.event_engine: Optional[EventEngine] = None
+        self.active: bool = False
+        self.thread: Optional[Thread] = None
+
+    def poll(self, timeout: float = 0) -> Optional[Event]:
+        payload = self.event_ring.read()
+        if payload is None and timeout > 0:
+            end_time = monotonic() + timeout
+            idle = 0
+            while payload is None and monotonic() < end_time:
+                idle = min(idle + 1, 10)
+                sleep(0.0001 * idle)
+                payload = self.event_ring.read()
+
+        if payload is None:
+            return None
+        return self.decode(payload)
+
+    def send_order(self, req: OrderRequest, gateway_name: str) -> int:
+        return self._send_request(REQUEST_SEND, req, gateway_name)
+
+    def cancel_order(self, req: CancelRequest, gateway_name: str) -> int:
+        return self._send_request(REQUEST_CANCEL, req, gateway_name)
+
+    def _send_request(self, kind: int, req: Any, gateway_name: str) -> int:
+        with self.request_lock:
+            request_id = next(self.request_ids)
+            payload = pickle.dumps((kind, request_id, req, gateway_name), pickle.HIGHEST_PROTOCOL)
+            if not self.request_ring.write(payload):
+                return 0
+            return request_id
+
+    def start(self, event_engine: EventEngine) -> None:
+        # pump bus events into a local event engine of the strategy process
+        self.event_engine = event_engine
+        self.active = True
+        self.thread = Thread(target=self.run)
+        self.thread.start()
+
+    def run(self) -> None:
+        while self.active:
+            event = self.poll(timeout=0.1)
+            if event:
+                self.event_engine.put(event)
+
+    def close(self) -> None:
+        self.active = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+
+        self.event_ring.close()
+        self.request_ring.close()
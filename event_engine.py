@@ -1,71 +1,679 @@
-from collections import defaultdict
-from queue import Empty, Queue
-from threading import Thread
-from time import sleep
-from typing import Any, Callable, List
+from collections import defaultdict, deque
+from enum import Enum, IntEnum
+from queue import Empty
+from threading import Condition, Event as ThreadEvent, Lock, Thread, local
+from time import monotonic, perf_counter
+from typing import Any, Callable, Container, Dict, Hashable, List, Optional, Tuple
+
+from event_stats import EventEngineStats
+from event_timer import TimerWheel
 
 EVENT_TIMER = "eTimer"
+EVENT_ENGINE_STATS = "eEngineStats"
 
 
 class Event:
-    def __init__(self, type: str, data: Any = None):
+    # ```
+    # internal is set by producers whose events replay produces again from
+    # other events, e.g. timers and engines publishing derived state. The
+    # journal does not record them.
+    # ```
+    internal: bool = False
+
+    def __init__(self, type: str, data: Any = None, internal: bool = False):
         self.type: str = type
         self.data: Any = data
+        if internal:
+            self.internal = True
 
 
 HandlerType = Callable[[Event], None]
+BatchHandlerType = Callable[[List[Event]], None]
+ShardKeyType = Callable[[Event], Optional[str]]
+
+
+def match_type(registered: str, type: str) -> bool:
+    # ```
+    # A registered type ending with "." is a prefix and matches every event
+    # type below it, e.g. "eTick." matches "eTick.btcusdt.HUOBI"; other
+    # registered types only match exactly
+    # ```
+    if registered == type:
+        return True
+    return registered.endswith(".") and type.startswith(registered)
+
+
+def route_type(registered: Container[str], type: str) -> str:
+    # ```
+    # The registered type every lookup for type resolves through: type
+    # itself if registered, else its longest registered "." prefix, else "".
+    # Caches and counters keyed by it stay as small as the registrations,
+    # however many distinct types are put, e.g. one per vt_orderid.
+    # ```
+    if type in registered:
+        return type
+
+    end = len(type)
+    while True:
+        end = type.rfind(".", 0, end)
+        if end < 0:
+            return ""
+        prefix = type[:end + 1]
+        if prefix in registered:
+            return prefix
+
+
+def vt_symbol_shard_key(event: Event) -> Optional[str]:
+    # tick/order/trade/position data all carry vt_symbol, others go to the first shard
+    return getattr(event.data, "vt_symbol", None)
+
+
+class QueuePolicy(Enum):
+    # what put does with an event when the queue is full
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    CONFLATE = "conflate"
+
+
+class EventPriority(IntEnum):
+    # dispatch lanes, lower value is drained first
+    CRITICAL = 0
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+
+
+class EventQueue:
+    # ```
+    # Queue of events with one FIFO lane per EventPriority and an optional
+    # capacity (maxsize <= 0 means unbounded). get drains higher lanes first,
+    # but a non-empty lower lane is served after it has been passed over
+    # starvation_limit times. close wakes every waiting get, which then
+    # returns the remaining events and raises Empty once there are none.
+    # An event put with a conflation key replaces a
+    # not-yet-dispatched event with the same key in place, so the consumer
+    # only sees the latest one and the queue cannot grow beyond one pending
+    # event per key. A BLOCK put with block False overflows the capacity
+    # instead of waiting, for producers that are themselves the consumer.
+    # Conflated and dropped events are counted per route, the event type
+    # if none is given, and DROP_OLDEST evicts the oldest event of the
+    # same route.
+    # ```
+    def __init__(self, maxsize: int = 0, starvation_limit: int = 100):
+        self.maxsize: int = maxsize
+        self.starvation_limit: int = starvation_limit
+        self._lanes: List[deque] = [deque() for _ in EventPriority]
+        self._skipped: List[int] = [0 for _ in EventPriority]
+        self._size: int = 0
+        self._pending: Dict[Hashable, list] = {}
+        self._mutex: Lock = Lock()
+        self._not_empty: Condition = Condition(self._mutex)
+        self._not_full: Condition = Condition(self._mutex)
+        self.conflated_count: defaultdict = defaultdict(int)
+        self.dropped_count: defaultdict = defaultdict(int)
+        self.high_water: int = 0
+        self._closed: bool = False
+
+    def put(
+            self,
+            event: Event,
+            key: Hashable = None,
+            policy: QueuePolicy = QueuePolicy.BLOCK,
+            priority: int = EventPriority.NORMAL,
+            block: bool = True,
+            route: str = None
+    ) -> bool:
+        # return False if the event was dropped
+        if route is None:
+            route = event.type
+        with self._mutex:
+            if key is not None:
+                slot = self._pending.get(key, None)
+                if slot:
+                    slot[0] = event
+                    self.conflated_count[route] += 1
+                    return True
+
+            if 0 < self.maxsize <= self._size:
+                if policy is QueuePolicy.BLOCK:
+                    while block and self._size >= self.maxsize and not self._closed:
+                        self._not_full.wait()
+                elif policy is QueuePolicy.DROP_OLDEST and self._drop_oldest(priority, route):
+                    pass
+                else:
+                    self.dropped_count[route] += 1
+                    return False
+
+            slot = [event, key, route]
+            if key is not None:
+                self._pending[key] = slot
+
+            self._lanes[priority].append(slot)
+            self._size += 1
+            if self._size > self.high_water:
+                self.high_water = self._size
+            self._not_empty.notify()
+            return True
+
+    def _drop_oldest(self, priority: int, route: str) -> bool:
+        # remove the oldest queued event of the same route to make room
+        lane = self._lanes[priority]
+        for i, slot in enumerate(lane):
+            if slot[2] == route:
+                del lane[i]
+                if slot[1] is not None:
+                    self._pending.pop(slot[1])
+                self._size -= 1
+                self.dropped_count[route] += 1
+                return True
+        return False
+
+    def _pop(self) -> Event:
+        chosen = -1
+        for priority, lane in enumerate(self._lanes):
+            if not lane:
+                continue
+            if chosen < 0:
+                chosen = priority
+                continue
+
+            self._skipped[priority] += 1
+            if self._skipped[priority] > self.starvation_limit:
+                chosen = priority
+                break
+
+        self._skipped[chosen] = 0
+        event, key, _ = self._lanes[chosen].popleft()
+        if key is not None:
+            self._pending.pop(key)
+        self._size -= 1
+        self._not_full.notify()
+        return event
+
+    def get(self, block: bool = True, timeout: float = None) -> Event:
+        with self._mutex:
+            if not block or self._closed:
+                if not self._size:
+                    raise Empty
+            elif timeout is None:
+                while not self._size:
+                    if self._closed:
+                        raise Empty
+                    self._not_empty.wait()
+            else:
+                end_time = monotonic() + timeout
+                while not self._size:
+                    remaining = end_time - monotonic()
+                    if remaining <= 0 or self._closed:
+                        raise Empty
+                    self._not_empty.wait(remaining)
+
+            return self._pop()
+
+    def close(self) -> None:
+        with self._mutex:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def open(self) -> None:
+        with self._mutex:
+            self._closed = False
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return not self._size
+
+    def full(self) -> bool:
+        return 0 < self.maxsize <= self._size
+
+
+DEFAULT_POLICY = (QueuePolicy.BLOCK, vt_symbol_shard_key)
+
+
+class BatchHandler:
+    # ```
+    # Collects events for a handler taking a list of events. Every worker
+    # thread keeps its own pending list so per-shard ordering is preserved.
+    # ```
+    def __init__(self, handler: BatchHandlerType, max_batch: int, max_wait: float, workers: int):
+        self.handler: BatchHandlerType = handler
+        self.max_batch: int = max_batch
+        self.max_wait: float = max_wait
+        self.pending: List[List[Event]] = [[] for _ in range(workers)]
+        self.since: List[float] = [0 for _ in range(workers)]
+
+    def add(self, event: Event, worker: int) -> None:
+        pending = self.pending[worker]
+        if not pending:
+            self.since[worker] = monotonic()
+
+        pending.append(event)
+        if len(pending) >= self.max_batch:
+            self.flush(worker)
+
+    def flush(self, worker: int, force: bool = True) -> None:
+        pending = self.pending[worker]
+        if not pending:
+            return
+        if not force and monotonic() - self.since[worker] < self.max_wait:
+            return
+
+        self.pending[worker] = []
+        self.handler(pending)
 
 
 class EventEngine:
-    def __init__(self, interval: int = 1):
+    def __init__(
+            self,
+            interval: int = 1,
+            workers: int = 1,
+            shard_key: ShardKeyType = vt_symbol_shard_key,
+            maxsize: int = 0,
+            starvation_limit: int = 100
+    ):
+        # ```
+        # workers > 1 enables sharded dispatch: events are routed to one of the
+        # worker queues by shard_key, so events with the same key keep their order
+        # while different keys are processed in parallel.
+        # maxsize > 0 bounds every worker queue, see set_queue_policy.
+        # starvation_limit is how many times a lower priority lane may be
+        # passed over before it is served, see set_priority
+        # ```
         self._interval: int = interval
-        self._queue: Queue = Queue()
+        self._workers: int = max(1, workers)
+        self._shard_key: ShardKeyType = shard_key
+        self._queues: List[EventQueue] = [
+            EventQueue(maxsize, starvation_limit) for _ in range(self._workers)
+        ]
+        self._queue: EventQueue = self._queues[0]
         self._active: bool = False
-        self._thread: Thread = Thread(target=self._run)
-        self._timer: Thread = Thread(target=self._run_timer)
+        self._drain: bool = False
+        self._timer_stop: ThreadEvent = ThreadEvent()
+        self._timer_condition: Condition = Condition()
+        self._timer_changed: bool = False
+        self._timer_wheel: TimerWheel = TimerWheel()
+        # set in the worker and timer threads, whose puts must never block
+        self._local: local = local()
+        self._create_threads()
         self._handlers: defaultdict = defaultdict(list)
         self._general_handlers: List = []
+        self._dispatch: Dict[str, List[HandlerType]] = {}
+        self._batch_handlers: defaultdict = defaultdict(list)
+        self._batch_dispatch: Dict[str, List[BatchHandler]] = {}
+        self._policies: Dict[str, Tuple[QueuePolicy, ShardKeyType]] = {}
+        self._policy_cache: Dict[str, Tuple[QueuePolicy, ShardKeyType]] = {}
+        self._priorities: Dict[str, EventPriority] = {}
+        self._priority_cache: Dict[str, EventPriority] = {}
+        self._routes: frozenset = frozenset()
+        self._stats: Optional[EventEngineStats] = None
+        self._stats_timer: int = 0
+
+        self.add_timer(self._interval, EVENT_TIMER)
+
+    def _create_threads(self) -> None:
+        self._threads: List[Thread] = [
+            Thread(target=self._run, args=(worker,)) for worker in range(self._workers)
+        ]
+        self._thread: Thread = self._threads[0]
+        self._timer: Thread = Thread(target=self._run_timer)
 
-    def _run(self) -> None:
+    def _run(self, worker: int) -> None:
         # ```
-        # Get event from queue and process it
+        # Get event from queue and process it.
+        # Pending batches are flushed once the queue is empty, or when
+        # their max_wait has passed while the queue stays busy.
+        # get blocks until an event arrives or stop closes the queue.
         # ```
+        self._local.engine_thread = True
+        queue = self._queues[worker]
         while self._active:
             try:
-                event = self._queue.get(block=True, timeout=1)
-                self._process(event)
+                event = queue.get(block=True)
             except Empty:
-                pass
+                break
+            self._process(event, worker)
 
-    def _process(self, event: Event) -> None:
-        if event.type in self._handlers:
-            [handler(event) for handler in self._handlers[event.type]]
-        if event.type in self._general_handlers:
-            [handler(event) for handler in self._general_handlers[event.type]]
+            if self._batch_handlers:
+                self._flush_batches(worker, queue.empty())
+
+        if self._drain:
+            while True:
+                try:
+                    event = queue.get(block=False)
+                except Empty:
+                    break
+                self._process(event, worker)
+
+        self._flush_batches(worker)
+
+    def _process(self, event: Event, worker: int = 0) -> None:
+        route = route_type(self._routes, event.type)
+        if self._stats:
+            self._process_with_stats(event, route)
+        else:
+            handlers = self._dispatch.get(route, None)
+            if handlers is None:
+                handlers = self._get_handlers(route)
+            if handlers:
+                [handler(event) for handler in handlers]
+            if self._general_handlers:
+                [handler(event) for handler in self._general_handlers]
+
+        if self._batch_handlers:
+            batch_handlers = self._batch_dispatch.get(route, None)
+            if batch_handlers is None:
+                batch_handlers = self._get_batch_handlers(route)
+            for batch_handler in batch_handlers:
+                batch_handler.add(event, worker)
+
+    def _flush_batches(self, worker: int, force: bool = True) -> None:
+        for batch_handlers in list(self._batch_handlers.values()):
+            for batch_handler in batch_handlers:
+                batch_handler.flush(worker, force)
+
+    def _update_routes(self) -> None:
+        # call after any registration change, drops every cache keyed by route
+        self._routes = frozenset(
+            list(self._handlers) + list(self._batch_handlers) + list(self._policies) + list(self._priorities)
+        )
+        self._dispatch = {}
+        self._batch_dispatch = {}
+        self._policy_cache = {}
+        self._priority_cache = {}
+
+    def _get_batch_handlers(self, type: str) -> List[BatchHandler]:
+        batch_handlers = []
+        for registered, batch_list in list(self._batch_handlers.items()):
+            if match_type(registered, type):
+                for batch_handler in batch_list:
+                    if batch_handler not in batch_handlers:
+                        batch_handlers.append(batch_handler)
+
+        self._batch_dispatch[type] = batch_handlers
+        return batch_handlers
+
+    def _get_handlers(self, type: str) -> List[HandlerType]:
+        # resolve and cache the handlers of every registered type matching the route type
+        handlers = []
+        for registered, handler_list in list(self._handlers.items()):
+            if match_type(registered, type):
+                for handler in handler_list:
+                    if handler not in handlers:
+                        handlers.append(handler)
+
+        self._dispatch[type] = handlers
+        return handlers
+
+    def _process_with_stats(self, event: Event, route: str) -> None:
+        # recorded per route, "" for types nothing is registered for
+        stats = self._stats
+        start = perf_counter()
+
+        put_time = getattr(event, "put_time", None)
+        if put_time:
+            stats.record_wait(route, start - put_time)
+
+        handlers = self._dispatch.get(route, None)
+        if handlers is None:
+            handlers = self._get_handlers(route)
+        for handler in handlers + self._general_handlers:
+            handler(event)
+            end = perf_counter()
+            stats.record_handler(route, handler, end - start)
+            start = end
 
     def _run_timer(self) -> None:
-        while self._active:
-            sleep(self._interval)
-            event = Event(EVENT_TIMER)
-            self.put(event)
+        # ```
+        # Drive the timer wheel: fire what is due, then sleep until the next
+        # occupied slot or until add_timer/stop wakes us up
+        # ```
+        self._local.engine_thread = True
+        wheel = self._timer_wheel
+        while not self._timer_stop.is_set():
+            wheel.advance()
+
+            with self._timer_condition:
+                if self._timer_changed:
+                    self._timer_changed = False
+                    continue
+                if self._timer_stop.is_set():
+                    break
+                self._timer_condition.wait(wheel.next_delay())
+
+    def _wakeup_timer(self) -> None:
+        with self._timer_condition:
+            self._timer_changed = True
+            self._timer_condition.notify()
+
+    def add_timer(self, interval: float, type: str, data: Any = None, repeat: bool = True) -> int:
+        # ```
+        # Put Event(type, data) after interval seconds (millisecond
+        # resolution), and then every interval unless repeat is False.
+        # Return a timer id for cancel_timer.
+        # ```
+        timer_id = self._timer_wheel.add(interval, lambda: self.put(Event(type, data, internal=True)), repeat)
+        self._wakeup_timer()
+        return timer_id
+
+    def cancel_timer(self, timer_id: int) -> bool:
+        return self._timer_wheel.cancel(timer_id)
+
+    def _put_stats(self) -> None:
+        if self._stats:
+            self.put(Event(EVENT_ENGINE_STATS, self.get_stats(), internal=True))
 
     def start(self) -> None:
+        if self._active:
+            return
+
+        # threads can only be started once, create new ones after a stop
+        if self._thread.ident is not None:
+            self._create_threads()
+
         self._active = True
-        self._thread.start()
+        self._drain = False
+        self._timer_stop.clear()
+        self._timer_wheel.reset()
+        for queue in self._queues:
+            queue.open()
+
+        for thread in self._threads:
+            thread.start()
         self._timer.start()
 
-    def stop(self) -> None:
+    def stop(self, drain: bool = False) -> None:
+        # ```
+        # Wake up and join the worker and timer threads. With drain the
+        # workers first process the events still queued, otherwise they
+        # are left in the queue.
+        # ```
+        self._drain = drain
         self._active = False
-        self._timer.join()
-        self._thread.join()
+        self._timer_stop.set()
+        self._wakeup_timer()
+        for queue in self._queues:
+            queue.close()
+
+        if self._timer.ident is not None:
+            self._timer.join()
+        for thread in self._threads:
+            if thread.ident is not None:
+                thread.join()
+
+    def get_shard(self, event: Event) -> int:
+        if self._workers == 1:
+            return 0
+
+        key = self._shard_key(event)
+        if key is None:
+            return 0
+        return hash(key) % self._workers
+
+    def put(self, event: Event) -> bool:
+        # ```
+        # Return False if the queue was full and the event dropped by its
+        # policy. Handlers and timers run on the engine threads, which would
+        # wait on their own queue forever, so their BLOCK puts overflow.
+        # ```
+        if self._stats:
+            event.put_time = perf_counter()
+
+        queue = self._queues[self.get_shard(event)]
+
+        route = route_type(self._routes, event.type)
+        policy, key_func = self._policy_cache.get(route, None) or self._get_policy(route)
+        priority = self._priority_cache.get(route, None)
+        if priority is None:
+            priority = self._get_priority(route)
+
+        block = not getattr(self._local, "engine_thread", False)
+        if policy is QueuePolicy.CONFLATE:
+            key = key_func(event)
+            if key is not None:
+                return queue.put(event, (event.type, key), policy, priority, block, route)
+
+        return queue.put(event, None, policy, priority, block, route)
+
+    def _get_priority(self, type: str) -> EventPriority:
+        # exact type first, then the longest matching prefix
+        priority = self._priorities.get(type, None)
+        if priority is None:
+            prefixes = [registered for registered in self._priorities if match_type(registered, type)]
+            if prefixes:
+                priority = self._priorities[max(prefixes, key=len)]
+            else:
+                priority = EventPriority.NORMAL
+
+        self._priority_cache[type] = priority
+        return priority
+
+    def set_priority(self, type: str, priority: EventPriority) -> None:
+        # ```
+        # Put events of a type (or of every type below a "." prefix) into a
+        # dispatch lane. Events in the same lane keep their order, types
+        # without a priority go to NORMAL.
+        # ```
+        self._priorities[type] = priority
+        self._update_routes()
 
-    def put(self, event: Event) -> None:
-        self._queue.put(event)
+    def unset_priority(self, type: str) -> None:
+        self._priorities.pop(type, None)
+        self._update_routes()
+
+    def _get_policy(self, type: str) -> Tuple[QueuePolicy, ShardKeyType]:
+        # exact type first, then the longest matching prefix
+        policy = self._policies.get(type, None)
+        if not policy:
+            prefixes = [registered for registered in self._policies if match_type(registered, type)]
+            if prefixes:
+                policy = self._policies[max(prefixes, key=len)]
+            else:
+                policy = DEFAULT_POLICY
+
+        self._policy_cache[type] = policy
+        return policy
+
+    def set_queue_policy(
+            self,
+            type: str,
+            policy: QueuePolicy,
+            key_func: ShardKeyType = vt_symbol_shard_key
+    ) -> None:
+        # ```
+        # Choose what happens to events of a type when the queue is full:
+        # BLOCK the producer (default), DROP_OLDEST queued event of the type,
+        # DROP_NEWEST (the incoming one) or CONFLATE, which always replaces a
+        # pending event with the same key_func key and drops the newest when
+        # there is nothing to replace. A type ending with "." also applies to
+        # every type below it.
+        # ```
+        self._policies[type] = (policy, key_func)
+        self._update_routes()
+
+    def unset_queue_policy(self, type: str) -> None:
+        self._policies.pop(type, None)
+        self._update_routes()
+
+    def set_conflation(self, type: str, key_func: ShardKeyType = vt_symbol_shard_key) -> None:
+        # ```
+        # Opt in an event type to conflation: a newer event with the same key
+        # replaces an older one still waiting in the queue, e.g. the latest tick
+        # per vt_symbol for EVENT_TICK
+        # ```
+        self.set_queue_policy(type, QueuePolicy.CONFLATE, key_func)
+
+    def unset_conflation(self, type: str) -> None:
+        self.unset_queue_policy(type)
+
+    def get_conflated_count(self, type: str = "") -> int:
+        # number of events merged into a newer one, for one type or in total
+        return self._sum_counts([queue.conflated_count for queue in self._queues], type)
+
+    def get_dropped_count(self, type: str = "") -> int:
+        # number of events dropped because the queue was full
+        return self._sum_counts([queue.dropped_count for queue in self._queues], type)
+
+    @staticmethod
+    def _sum_counts(counts: List[Dict[str, int]], type: str) -> int:
+        total = 0
+        for count in counts:
+            for counted, value in list(count.items()):
+                if not type or match_type(type, counted):
+                    total += value
+        return total
+
+    def get_queue_size(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    def get_high_water(self) -> int:
+        # largest depth any worker queue has reached
+        return max(queue.high_water for queue in self._queues)
+
+    def reset_high_water(self) -> None:
+        for queue in self._queues:
+            queue.high_water = queue.qsize()
+
+    def enable_stats(self, interval: int = 0) -> None:
+        # ```
+        # Record queue wait per event type and execution time per handler.
+        # With interval > 0 a snapshot is also put as EVENT_ENGINE_STATS every
+        # interval seconds.
+        # ```
+        if not self._stats:
+            self._stats = EventEngineStats()
+
+        if self._stats_timer:
+            self._timer_wheel.cancel(self._stats_timer)
+            self._stats_timer = 0
+        if interval > 0:
+            self._stats_timer = self._timer_wheel.add(interval, self._put_stats, True)
+            self._wakeup_timer()
+
+    def disable_stats(self) -> None:
+        self._stats = None
+        if self._stats_timer:
+            self._timer_wheel.cancel(self._stats_timer)
+            self._stats_timer = 0
+
+    def get_stats(self) -> dict:
+        if not self._stats:
+            return {}
+        return self._stats.to_dict()
+
+    def reset_stats(self) -> None:
+        if self._stats:
+            self._stats.reset()
 
     def register(self, type: object, handler: object) -> object:
+        # type ending with "." subscribes to every event type below it
         handler_list = self._handlers[type]
         if handler not in handler_list:
             handler_list.append(handler)
+        self._update_routes()
 
     def unregister(self, type: str, handler: HandlerType) -> None:
         handler_list = self._handlers[type]
@@ -74,6 +682,38 @@ class EventEngine:
             handler_list.remove(handler)
         if not handler_list:
             self._handlers.pop(type)
+        self._update_routes()
+
+    def register_batch(
+            self,
+            type: str,
+            handler: BatchHandlerType,
+            max_batch: int = 1000,
+            max_wait: float = 0.05
+    ) -> None:
+        # ```
+        # Register a handler called with a list of events of type instead of
+        # one event at a time. A batch is delivered when max_batch events are
+        # pending, when the queue runs empty, or after max_wait seconds while
+        # the queue stays busy.
+        # ```
+        batch_list = self._batch_handlers[type]
+        for batch_handler in batch_list:
+            if batch_handler.handler == handler:
+                return
+
+        batch_list.append(BatchHandler(handler, max_batch, max_wait, self._workers))
+        self._update_routes()
+
+    def unregister_batch(self, type: str, handler: BatchHandlerType) -> None:
+        batch_list = self._batch_handlers[type]
+
+        for batch_handler in list(batch_list):
+            if batch_handler.handler == handler:
+                batch_list.remove(batch_handler)
+        if not batch_list:
+            self._batch_handlers.pop(type)
+        self._update_routes()
 
     def register_general(self, handler: HandlerType) -> None:
         if handler not in self._general_handlers:
@@ -0,0 +1,190 @@
+import asyncio
+from collections import defaultdict, deque
+from itertools import count
+from threading import Thread, get_ident
+from typing import Any, Callable, Dict, List, Optional
+
+from event_engine import EVENT_TIMER, Event, HandlerType, match_type, route_type
+
+
+class AsyncEventEngine:
+    # ```
+    # Event engine running on an asyncio loop with the same register/put/
+    # start/stop surface as EventEngine. Handlers may be plain functions or
+    # coroutine functions, which are awaited in order. put can be called
+    # from the loop or from any other thread.
+    # Without a loop the engine runs its own loop in one thread, otherwise
+    # it schedules itself on the given loop so the whole trader can share it.
+    # ```
+    def __init__(self, interval: int = 1, loop: asyncio.AbstractEventLoop = None):
+        self._interval: int = interval
+        self._own_loop: bool = loop is None
+        self._loop: asyncio.AbstractEventLoop = loop or asyncio.new_event_loop()
+        self._thread: Optional[Thread] = None
+        self._loop_thread: int = 0
+
+        self._events: deque = deque()
+        self._waiter: Optional[asyncio.Future] = None
+        self._waiting: bool = False
+        self._active: bool = False
+        self._drain: bool = False
+        self._done: Optional[asyncio.Future] = None
+
+        self._handlers: defaultdict = defaultdict(list)
+        self._general_handlers: List = []
+        self._dispatch: Dict[str, List[HandlerType]] = {}
+
+        self._timer_ids = count(1)
+        self._timers: Dict[int, asyncio.TimerHandle] = {}
+
+    async def _run(self) -> None:
+        # ```
+        # Process queued events, then park on a future until put wakes us up
+        # ```
+        self._loop_thread = get_ident()
+        while self._active:
+            while self._events and self._active:
+                await self._process(self._events.popleft())
+
+            if not self._active:
+                break
+
+            self._waiter = self._loop.create_future()
+            self._waiting = True
+            if self._events:
+                self._waiting = False
+                continue
+            await self._waiter
+
+        if self._drain:
+            while self._events:
+                await self._process(self._events.popleft())
+
+        for handle in self._timers.values():
+            handle.cancel()
+        self._timers.clear()
+
+    async def _process(self, event: Event) -> None:
+        route = route_type(self._handlers, event.type)
+        handlers = self._dispatch.get(route, None)
+        if handlers is None:
+            handlers = self._get_handlers(route)
+
+        for handler in handlers + self._general_handlers:
+            result = handler(event)
+            if asyncio.iscoroutine(result):
+                await result
+
+    def _get_handlers(self, type: str) -> List[HandlerType]:
+        handlers = []
+        for registered, handler_list in list(self._handlers.items()):
+            if match_type(registered, type):
+                for handler in handler_list:
+                    if handler not in handlers:
+                        handlers.append(handler)
+
+        self._dispatch[type] = handlers
+        return handlers
+
+    def _wakeup(self) -> None:
+        if self._waiter and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def _call_soon(self, callback: Callable, *args: Any) -> None:
+        if get_ident() == self._loop_thread:
+            callback(*args)
+        else:
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def _start_tasks(self) -> None:
+        self._done = self._loop.create_task(self._run())
+        self.add_timer(self._interval, EVENT_TIMER)
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop_thread = get_ident()
+        self._start_tasks()
+        self._loop.run_until_complete(self._done)
+
+    def start(self) -> None:
+        if self._active:
+            return
+        self._active = True
+        self._drain = False
+
+        if self._own_loop:
+            self._thread = Thread(target=self._run_loop)
+            self._thread.start()
+        else:
+            self._loop.call_soon_threadsafe(self._start_tasks)
+
+    def stop(self, drain: bool = False) -> None:
+        # ```
+        # With its own loop, wait for the loop thread to finish. On a shared
+        # loop this only signals the engine, await wait_closed() to wait.
+        # ```
+        self._drain = drain
+        self._active = False
+        self._call_soon(self._wakeup)
+
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    async def wait_closed(self) -> None:
+        if self._done:
+            await self._done
+
+    def put(self, event: Event) -> None:
+        self._events.append(event)
+        if self._waiting:
+            self._waiting = False
+            self._call_soon(self._wakeup)
+
+    def add_timer(self, interval: float, type: str, data: Any = None, repeat: bool = True) -> int:
+        # same contract as EventEngine.add_timer, scheduled with loop.call_later
+        timer_id = next(self._timer_ids)
+
+        def fire() -> None:
+            if repeat and timer_id in self._timers:
+                self._timers[timer_id] = self._loop.call_later(interval, fire)
+            else:
+                self._timers.pop(timer_id, None)
+            self.put(Event(type, data, internal=True))
+
+        def arm() -> None:
+            self._timers[timer_id] = self._loop.call_later(interval, fire)
+
+        self._call_soon(arm)
+        return timer_id
+
+    def cancel_timer(self, timer_id: int) -> None:
+        def cancel() -> None:
+            handle = self._timers.pop(timer_id, None)
+            if handle:
+                handle.cancel()
+
+        self._call_soon(cancel)
+
+    def register(self, type: str, handler: HandlerType) -> None:
+        handler_list = self._handlers[type]
+        if handler not in handler_list:
+            handler_list.append(handler)
+        self._dispatch = {}
+
+    def unregister(self, type: str, handler: HandlerType) -> None:
+        handler_list = self._handlers[type]
+
+        if handler in handler_list:
+            handler_list.remove(handler)
+        if not handler_list:
+            self._handlers.pop(type)
+        self._dispatch = {}
+
+    def register_general(self, handler: HandlerType) -> None:
+        if handler not in self._general_handlers:
+            self._general_handlers.append(handler)
+
+    def unregister_general(self, handler: HandlerType) -> None:
+        if handler in self._general_handlers:
+            self._general_handlers.remove(handler)
@@ -0,0 +1,136 @@
+import struct
+from pathlib import Path
+from threading import Lock
+from time import sleep, time
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional, Tuple, Union
+
+from event_engine import EVENT_TIMER, Event, EventEngine
+from trader_codec import decode_data, encode_data
+
+JOURNAL_MAGIC = b"FXJ1"
+
+# record: length of the rest, timestamp, length of the type, type, payload
+RECORD = struct.Struct("<IdH")
+
+
+class EventJournal:
+    # ```
+    # Append-only binary journal of the events dispatched by an event
+    # engine, one length-prefixed record per event. It records through a
+    # general handler, so the journal holds what handlers actually saw,
+    # after conflation and drops. Events marked internal (timer ticks,
+    # checkpoints, published positions, stats) are not recorded, replay
+    # produces them again. Everything else is, whichever thread put it:
+    # gateway callbacks of orders a strategy sends from a handler are input
+    # a fresh MainEngine without that strategy needs.
+    # ```
+    def __init__(
+            self,
+            event_engine: EventEngine,
+            path: Union[str, Path],
+            skip_types: Iterable[str] = (EVENT_TIMER,),
+            encode: Callable[[Any], bytes] = encode_data,
+            buffering: int = 1024 * 1024
+    ):
+        self.event_engine: EventEngine = event_engine
+        self.path: Path = Path(path)
+        self.skip_types: set = set(skip_types)
+        self.encode: Callable[[Any], bytes] = encode
+        self.buffering: int = buffering
+
+        self.file: Optional[BinaryIO] = None
+        self.lock: Lock = Lock()
+        self.count: int = 0
+
+    def start(self) -> None:
+        new_file = not self.path.exists() or not self.path.stat().st_size
+        self.file = open(self.path, "ab", buffering=self.buffering)
+        if new_file:
+            self.file.write(JOURNAL_MAGIC)
+
+        self.event_engine.register_general(self.process_event)
+
+    def close(self) -> None:
+        self.event_engine.unregister_general(self.process_event)
+
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+    def flush(self) -> None:
+        with self.lock:
+            if self.file:
+                self.file.flush()
+
+    def process_event(self, event: Event) -> None:
+        if event.internal or event.type in self.skip_types:
+            return
+        self.write(event, time())
+
+    def write(self, event: Event, timestamp: float) -> None:
+        type = event.type.encode("utf8")
+        payload = self.encode(event.data)
+        header = RECORD.pack(RECORD.size - 4 + len(type) + len(payload), timestamp, len(type))
+
+        with self.lock:
+            if not self.file:
+                return
+            self.file.write(header)
+            self.file.write(type)
+            self.file.write(payload)
+            self.count += 1
+
+
+def read_journal(
+        path: Union[str, Path],
+        decode: Callable[[bytes], Any] = decode_data
+) -> Iterator[Tuple[float, Event]]:
+    # yield (timestamp, event) in recorded order, a truncated last record is ignored
+    with open(path, "rb") as f:
+        if f.read(len(JOURNAL_MAGIC)) != JOURNAL_MAGIC:
+            raise ValueError(f"{path} is not an event journal")
+
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+
+            length, timestamp, type_length = RECORD.unpack(header)
+            body = f.read(length - RECORD.size + 4)
+            if len(body) < length - RECORD.size + 4:
+                return
+
+            type = body[:type_length].decode("utf8")
+            yield timestamp, Event(type, decode(memoryview(body)[type_length:]))
+
+
+def replay_journal(
+        path: Union[str, Path],
+        event_engine: EventEngine,
+        speed: float = 1.0,
+        decode: Callable[[bytes], Any] = decode_data
+) -> int:
+    # ```
+    # Put the recorded events into event_engine (e.g. of a fresh MainEngine).
+    # speed 1 keeps the original pacing, 2 replays twice as fast and 0 as
+    # fast as possible. Return the number of events replayed.
+    # ```
+    count = 0
+    first_recorded = 0
+    replay_start = 0
+
+    for timestamp, event in read_journal(path, decode):
+        if speed > 0:
+            if not count:
+                first_recorded = timestamp
+                replay_start = time()
+            else:
+                delay = (timestamp - first_recorded) / speed - (time() - replay_start)
+                if delay > 0:
+                    sleep(delay)
+
+        event_engine.put(event)
+        count += 1
+
+    return count
@@ -0,0 +1,171 @@
+from collections import defaultdict
+from threading import Lock
+from time import monotonic
+from typing import Dict, List, Tuple
+
+
+class LatencyHistogram:
+    # ```
+    # HDR style histogram of durations in seconds. Values are recorded in
+    # microseconds into log-linear buckets: exact below 2 ** precision,
+    # then 2 ** (precision - 1) buckets per power of two, so any percentile
+    # is reported within 1 / 2 ** (precision - 1) relative error while
+    # memory only grows with the number of used buckets.
+    # ```
+    def __init__(self, precision: int = 7):
+        self.precision: int = precision
+        self._half: int = 1 << (precision - 1)
+        self.buckets: defaultdict = defaultdict(int)
+        self.count: int = 0
+        self.total: float = 0
+        self.min: float = 0
+        self.max: float = 0
+
+    def _index(self, value: int) -> int:
+        shift = value.bit_length() - self.precision
+        if shift <= 0:
+            return value
+        return shift * self._half + (value >> shift)
+
+    def _lower_bound(self, index: int) -> int:
+        if index < 2 * self._half:
+            return index
+        shift = index // self._half - 1
+        return (index - shift * self._half) << shift
+
+    def record(self, seconds: float) -> None:
+        if seconds < 0:
+            seconds = 0
+        self.buckets[self._index(int(seconds * 1_000_000))] += 1
+
+        if not self.count or seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.count += 1
+        self.total += seconds
+
+    def mean(self) -> float:
+        if not self.count:
+            return 0
+        return self.total / self.count
+
+    def percentile(self, percent: float) -> float:
+        if not self.count:
+            return 0
+
+        threshold = self.count * percent / 100
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= threshold:
+                return min(self._lower_bound(index) / 1_000_000, self.max)
+        return self.max
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for index, count in other.buckets.items():
+            self.buckets[index] += count
+
+        if other.count and (not self.count or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+    def reset(self) -> None:
+        self.buckets.clear()
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.mean(),
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+
+class RollingHistogram:
+    # ```
+    # LatencyHistogram over the last window seconds, kept as slots
+    # histograms of window / slots seconds each. A slot is reset when the
+    # clock comes back around to it, so old samples age out slot by slot.
+    # ```
+    def __init__(self, window: float = 60, slots: int = 6, precision: int = 7):
+        self.window: float = window
+        self.slot_seconds: float = window / slots
+        self.histograms: List[LatencyHistogram] = [LatencyHistogram(precision) for _ in range(slots)]
+        self.epochs: List[int] = [0] * slots
+
+    def record(self, seconds: float, now: float = None) -> None:
+        epoch = int((now if now is not None else monotonic()) / self.slot_seconds)
+        i = epoch % len(self.histograms)
+        if self.epochs[i] != epoch:
+            self.epochs[i] = epoch
+            self.histograms[i].reset()
+        self.histograms[i].record(seconds)
+
+    def snapshot(self, now: float = None) -> LatencyHistogram:
+        # merged histogram of the slots still inside the window
+        epoch = int((now if now is not None else monotonic()) / self.slot_seconds)
+        merged = LatencyHistogram(self.histograms[0].precision)
+        for histogram, slot_epoch in zip(self.histograms, self.epochs):
+            if epoch - slot_epoch < len(self.histograms):
+                merged.merge(histogram)
+        return merged
+
+    def to_dict(self, now: float = None) -> dict:
+        return self.snapshot(now).to_dict()
+
+
+class EventEngineStats:
+    # ```
+    # Per event type queue wait (put to dispatch) and per handler execution
+    # time, collected by EventEngine when stats are enabled
+    # ```
+    def __init__(self):
+        self._lock: Lock = Lock()
+        self.wait: Dict[str, LatencyHistogram] = {}
+        self.handlers: Dict[Tuple[str, str], LatencyHistogram] = {}
+
+    def record_wait(self, type: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.wait.get(type, None)
+            if not histogram:
+                histogram = self.wait[type] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def record_handler(self, type: str, handler: object, seconds: float) -> None:
+        key = (type, get_handler_name(handler))
+        with self._lock:
+            histogram = self.handlers.get(key, None)
+            if not histogram:
+                histogram = self.handlers[key] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            handlers = defaultdict(dict)
+            for (type, name), histogram in self.handlers.items():
+                handlers[type][name] = histogram.to_dict()
+
+            return {
+                "wait": {type: histogram.to_dict() for type, histogram in self.wait.items()},
+                "handlers": dict(handlers),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.wait.clear()
+            self.handlers.clear()
+
+
+def get_handler_name(handler: object) -> str:
+    return getattr(handler, "__qualname__", None) or repr(handler)
@@ -0,0 +1,115 @@
+from itertools import count
+from threading import Lock
+from time import monotonic
+from typing import Callable, Dict, List
+
+TimerCallbackType = Callable[[], None]
+
+
+class Timer:
+    __slots__ = ("timer_id", "ticks", "rounds", "slot", "callback", "repeat")
+
+    def __init__(self, timer_id: int, ticks: int, callback: TimerCallbackType, repeat: bool):
+        self.timer_id: int = timer_id
+        self.ticks: int = ticks
+        self.rounds: int = 0
+        self.slot: int = 0
+        self.callback: TimerCallbackType = callback
+        self.repeat: bool = repeat
+
+
+class TimerWheel:
+    # ```
+    # Hashed timing wheel: size slots of tick seconds each. A timer goes into
+    # the slot its deadline falls on, with the number of full revolutions
+    # left as rounds, so add and cancel are O(1) whatever the interval and
+    # advancing only touches the slots that have come due.
+    # ```
+    def __init__(self, tick: float = 0.001, size: int = 1024):
+        self.tick: float = tick
+        self.size: int = size
+        self._slots: List[Dict[int, Timer]] = [{} for _ in range(size)]
+        self._timers: Dict[int, Timer] = {}
+        self._cursor: int = 0
+        self._time: float = monotonic()
+        self._lock: Lock = Lock()
+        self._ids = count(1)
+
+    def add(self, interval: float, callback: TimerCallbackType, repeat: bool = False) -> int:
+        # schedule callback after interval seconds, and every interval if repeat
+        ticks = max(1, round(interval / self.tick))
+        with self._lock:
+            timer = Timer(next(self._ids), ticks, callback, repeat)
+            self._timers[timer.timer_id] = timer
+
+            # deadline counts from now, which may be ahead of the cursor
+            lag = max(0, int((monotonic() - self._time) / self.tick))
+            self._schedule(timer, lag + ticks)
+        return timer.timer_id
+
+    def cancel(self, timer_id: int) -> bool:
+        with self._lock:
+            timer = self._timers.pop(timer_id, None)
+            if not timer:
+                return False
+            self._slots[timer.slot].pop(timer_id, None)
+            return True
+
+    def _schedule(self, timer: Timer, distance: int) -> None:
+        timer.slot = (self._cursor + distance) % self.size
+        timer.rounds = (distance - 1) // self.size
+        self._slots[timer.slot][timer.timer_id] = timer
+
+    def advance(self, now: float = None) -> int:
+        # ```
+        # Move the cursor up to now and run the callbacks of the timers that
+        # came due, outside of the lock. Return the number of timers fired.
+        # ```
+        if now is None:
+            now = monotonic()
+
+        due = []
+        with self._lock:
+            for _ in range(int((now - self._time) / self.tick)):
+                self._cursor = (self._cursor + 1) % self.size
+                self._time += self.tick
+
+                slot = self._slots[self._cursor]
+                if not slot:
+                    continue
+
+                for timer in list(slot.values()):
+                    if timer.rounds:
+                        timer.rounds -= 1
+                        continue
+
+                    slot.pop(timer.timer_id)
+                    due.append(timer.callback)
+                    if timer.repeat:
+                        self._schedule(timer, timer.ticks)
+                    else:
+                        self._timers.pop(timer.timer_id)
+
+        for callback in due:
+            callback()
+        return len(due)
+
+    def next_delay(self, now: float = None) -> float:
+        # seconds until the next non-empty slot, at most one revolution
+        if now is None:
+            now = monotonic()
+
+        with self._lock:
+            elapsed = now - self._time
+            for distance in range(1, self.size + 1):
+                if self._slots[(self._cursor + distance) % self.size]:
+                    return max(0.0, distance * self.tick - elapsed)
+            return max(0.0, self.size * self.tick - elapsed)
+
+    def reset(self, now: float = None) -> None:
+        # restart the clock without firing, e.g. when the driver thread starts
+        with self._lock:
+            self._time = now if now is not None else monotonic()
+
+    def __len__(self) -> int:
+        return len(self._timers)
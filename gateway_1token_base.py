@@ -2,13 +2,16 @@ from typing import Dict
 
 import pytz
 
-from event_engine import EventEngine, EVENT_TIMER, Event
+from event_engine import EventEngine, Event
 from trader_constant import Direction, Exchange
 from trader_gateway import BaseGateway
 from trader_object import CancelRequest, OrderRequest, SubscribeRequest
 
 REST_HOST = "https://1token.trade/api"
 
+EVENT_ONETOKEN_PING = "eOnetokenPing"
+PING_INTERVAL = 20
+
 DIRECTION_VT2ONETOKEN = {
     Direction.LONG: "b",
     Direction.SHORT: "s"
@@ -66,7 +69,7 @@ class OnetokenGateway(BaseGateway):
 
         self.rest_api = OnetokenRestApi(self)
 
-        self.count = 0
+        self.ping_timer = 0
 
     def connect(self, setting: Dict) -> None:
         key = setting["OT Key"]
@@ -97,15 +100,16 @@ class OnetokenGateway(BaseGateway):
         pass
 
     def close(self) -> None:
+        if self.ping_timer:
+            self.event_engine.cancel_timer(self.ping_timer)
+            self.ping_timer = 0
         self.rest_api.stop()
 
-    def process_timer_event(self, event: Event):
-        self.count += 1
-        if self.count < 20:
-            return
-        self.count = 0
-
-        print("PING PONG every 20 seconds")
+    def process_ping_event(self, event: Event):
+        print(f"PING PONG every {PING_INTERVAL} seconds")
 
     def init_ping(self):
-        self.event_engine.register(EVENT_TIMER, self.process_timer_event)
+        if self.ping_timer:
+            return
+        self.event_engine.register(EVENT_ONETOKEN_PING, self.process_ping_event)
+        self.ping_timer = self.event_engine.add_timer(PING_INTERVAL, EVENT_ONETOKEN_PING)
@@ -9,6 +9,7 @@ from urllib.parse import urlparse
 from api_rest_client import RestClient, Request
 from gateway_1token_base import CHINA_TZ, REST_HOST, DIRECTION_VT2ONETOKEN
 from trader_constant import Exchange, Product, Offset, Status
+from trader_contract_cache import ContractCache
 from trader_gateway import BaseGateway
 from trader_object import ContractData, OrderRequest, CancelRequest
 
@@ -29,6 +30,7 @@ class OnetokenRestApi(RestClient):
 
         self.connect_time = 0
         self.account = ""
+        self.contract_cache: ContractCache = None
 
     def sign(self, request: Request) -> Request:
         """
@@ -132,9 +134,16 @@ class OnetokenRestApi(RestClient):
 
     def query_contract(self) -> None:
         """
-        query contract
+        query contract, from the cache first while it is fresh
         :return:
         """
+        self.contract_cache = ContractCache(f"{self.gateway_name}_{self.exchange}")
+        contracts = self.contract_cache.load()
+        if contracts:
+            self.gateway.on_contracts(contracts)
+            self.gateway.write_log(f"合约缓存加载成功，数量：{len(contracts)}")
+            if self.contract_cache.is_fresh():
+                return
 
         self.add_request(
             "GET",
@@ -150,6 +159,7 @@ class OnetokenRestApi(RestClient):
         :param reqeust:
         :return:
         """
+        contracts = []
         for instrument_data in data:
             symbol = instrument_data["name"]
             contract = ContractData(
@@ -161,8 +171,12 @@ class OnetokenRestApi(RestClient):
                 pricetick=float(instrument_data["unit_amount"]),
                 gateway_name=self.gateway_name,
             )
-            self.gateway.on_contract(contract)
-        self.gateway.write_log("合约信息查询成功")
+            contracts.append(contract)
+
+        changed = self.contract_cache.update(contracts)
+        if changed:
+            self.gateway.on_contracts(changed)
+        self.gateway.write_log(f"合约信息查询成功，更新数量：{len(changed)}")
 
     def send_order(self, req: OrderRequest) -> str:
         """
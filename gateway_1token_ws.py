@@ -7,19 +7,22 @@ from gateway_1token_base import CHINA_TZ
 from gateway_huobi import generate_datetime
 from trader_gateway import BaseGateway
 from trader_object import SubscribeRequest, TickData
+from trader_orderbook import OrderBook
 
 DATA_WEBSOCKET_HOST = "wss://cdn.1tokentrade.cn/api/v1/ws/tick"
 TRADE_WEBSOCKET_HOST = "wss://cdn.1tokentrade.cn/api/v1/ws/trade"
 
 
 class OnetokenDataWebsocketApi(WebsocketClient):
-    def __init__(self, gateway: BaseGateway):
+    def __init__(self, gateway: BaseGateway, depth: int = 20):
         super(OnetokenDataWebsocketApi, self).__init__()
 
         self.gateway: BaseGateway = gateway
         self.gateway_name = gateway.gateway_name
+        self.depth = depth
         self.subscribed = {}
         self.ticks = {}
+        self.books = {}
         self.callbacks = {
             "auth": self.on_login,
             "single-tick-verbose": self.on_tick
@@ -48,6 +51,7 @@ class OnetokenDataWebsocketApi(WebsocketClient):
 
         contract_symbol = f"{req.exchange.value.lower()}/{req.symbol.lower()}"
         self.ticks[contract_symbol] = tick
+        self.books[contract_symbol] = OrderBook(req.symbol, req.exchange, self.gateway_name, self.depth)
 
         req = {
             "uri": "subscribe-single-tick-verbose",
@@ -97,15 +101,14 @@ class OnetokenDataWebsocketApi(WebsocketClient):
         tick.last_price = data["last"]
         tick.datetime = generate_datetime(data["time"][:-6])
 
-        bids = data["bids"]
-        asks = data["asks"]
-
-        for n, buf in enumerate(bids):
-            tick.__setattr__("bid_price_%s" % (n + 1), buf["price"])
-            tick.__setattr__("bid_volume_%s" % (n + 1), buf["volume"])
-        for n, buf in enumerate(asks):
-            tick.__setattr__("ask_price_%s" % (n + 1), buf["price"])
-            tick.__setattr__("ask_volume_%s" % (n + 1), buf["volume"])
+        # single-tick-verbose pushes the full depth every time
+        book: OrderBook = self.books[contract_symbol]
+        book.apply_snapshot(
+            [(buf["price"], buf["volume"]) for buf in data["bids"]],
+            [(buf["price"], buf["volume"]) for buf in data["asks"]],
+            tick.datetime
+        )
+        book.update_tick(tick)
         self.gateway.on_tick(copy(tick))
 
     def ping(self):
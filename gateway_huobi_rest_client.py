@@ -7,6 +7,7 @@ from api_rest_client import RestClient, Request
 from gateway_huobi import create_signature, REST_HOST, _split_url, INTERVAL_VT2HUOBI, generate_datetime, \
     ORDERTYPE_VT2HUOBI, CHINA_TZ, ORDERTYPE_HUOBI2VT, STATUS_HUOBI2VT, huobi_symbols, symbol_name_map
 from trader_constant import Exchange, Product, Status
+from trader_contract_cache import ContractCache
 from trader_gateway import BaseGateway
 from trader_object import HistoryRequest, BarData, OrderRequest, CancelRequest, OrderData, ContractData
 
@@ -25,6 +26,7 @@ class HuobiRestApi(RestClient):
         self.account_id: str = ""
 
         self.order_count: int = 0
+        self.contract_cache: ContractCache = ContractCache(self.gateway_name)
 
     def new_orderid(self) -> str:
         prefix = datetime.now().strftime("%Y%m%d-%H%M%S-")
@@ -88,8 +90,22 @@ class HuobiRestApi(RestClient):
         self.add_request(method="Get", path="/v1/order/openOrders", callback=self.on_query_order)
 
     def query_contract(self) -> None:
+        # publish the cached contracts at once, download only once they are stale
+        contracts = self.contract_cache.load()
+        if contracts:
+            self.publish_contracts(contracts)
+            self.gateway.write_log(f"合约缓存加载成功，数量：{len(contracts)}")
+            if self.contract_cache.is_fresh():
+                return
+
         self.add_request(method="Get", path="/v1/common/symbols", callback=self.on_query_contract)
 
+    def publish_contracts(self, contracts: List[ContractData]) -> None:
+        for contract in contracts:
+            huobi_symbols.add(contract.symbol)
+            symbol_name_map[contract.symbol] = contract.name
+        self.gateway.on_contracts(contracts)
+
     def query_history(self, req: HistoryRequest) -> List[BarData]:
         params = {
             "symbol": req.symbol,
@@ -201,20 +217,23 @@ class HuobiRestApi(RestClient):
                 volume=float(d["amount"]),
                 type=order_type,
                 direction=direction,
-                traded=STATUS_HUOBI2VT.get(d["state"], None),
+                traded=float(d["filled-amount"]),
+                status=STATUS_HUOBI2VT.get(d["state"], Status.NOTTRADED),
                 datetime=dt,
                 gateway_name=self.gateway_name,
             )
 
             self.gateway.on_order(order)
 
+        self.gateway.on_orders_synced()
         self.gateway.write_log("委托查询成功")
 
     def on_query_contract(self, data: dict, request: Request) -> None:
         if self.check_error(data, "查询合约"):
             return
+        contracts = []
         for d in data["data"]:
-            base_currency = d["base-currency"],
+            base_currency = d["base-currency"]
             quote_currency = d["quote-currency"]
             name = f"{base_currency.upper()}/{quote_currency.upper()}"
             pricetick = 1 / pow(10, d["price-precision"])
@@ -231,12 +250,13 @@ class HuobiRestApi(RestClient):
                 history_data=True,
                 gateway_name=self.gateway_name
             )
-            self.gateway.on_contract(contract)
+            contracts.append(contract)
 
-            huobi_symbols.add(contract.symbol)
-            symbol_name_map[contract.symbol] = contract.name
+        changed = self.contract_cache.update(contracts)
+        if changed:
+            self.publish_contracts(changed)
 
-        self.gateway.write_log("合约信息查询成功")
+        self.gateway.write_log(f"合约信息查询成功，更新数量：{len(changed)}")
 
     def on_send_order(self, data: dict, request: Request) -> None:
         order = request.extra
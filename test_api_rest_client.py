@@ -1,5 +1,9 @@
+import json
 import unittest
 import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import perf_counter, sleep
 
 from api_rest_client import *
 from trader_constant import Exchange
@@ -17,6 +21,64 @@ def on_failed(status_code: int, request: Request) -> None:
     print(msg)
 
 
+class SlowHandler(BaseHTTPRequestHandler):
+    # answers after 0.2 second, remembering the client port of each request
+    protocol_version = "HTTP/1.1"
+    ports = set()
+    lock = Lock()
+
+    def do_GET(self):
+        sleep(0.2)
+        with self.lock:
+            self.ports.add(self.client_address[1])
+
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRestClientWorkers(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+        self.server.daemon_threads = True
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        SlowHandler.ports.clear()
+
+        self.rest_client = RestClient()
+        self.rest_client.init(url_base=f"http://127.0.0.1:{self.server.server_port}", pool_size=2)
+        self.rest_client.start(4)
+
+    def test_concurrent(self):
+        results = []
+        for _ in range(2):
+            start = perf_counter()
+            for i in range(4):
+                self.rest_client.add_request("GET", f"/{i}", callback=lambda data, request: results.append(data))
+            self.rest_client.join()
+            # four workers answer four slow requests at once
+            self.assertLess(perf_counter() - start, 0.6)
+
+        self.assertEqual(8, len(results))
+        # each worker kept its connection alive for the second round
+        self.assertLessEqual(len(SlowHandler.ports), 4)
+
+    def test_blocking_request(self):
+        response = self.rest_client.request("GET", "/sync")
+        self.assertEqual({"path": "/sync"}, response.json())
+
+    def tearDown(self) -> None:
+        self.rest_client.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+
 class MyTestCase(unittest.TestCase):
     def on_error(self, exception_type: type, exception_value: Exception, tb: TracebackType, request: Request) -> None:
 
@@ -0,0 +1,130 @@
+import os
+import unittest
+from datetime import datetime
+from time import sleep
+
+from event_bus import *
+from trader_constant import Direction, Exchange, OrderType
+from trader_object import TickData
+
+
+class DummyMainEngine:
+    def __init__(self):
+        self.orders = []
+        self.cancels = []
+
+    def send_order(self, req: OrderRequest, gateway_name: str) -> str:
+        self.orders.append(req)
+        return f"{gateway_name}.{len(self.orders)}"
+
+    def cancel_order(self, req: CancelRequest, gateway_name: str) -> None:
+        self.cancels.append(req)
+
+
+class TestSharedRingBuffer(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.name = f"test_ring_{os.getpid()}"
+        self.writer = SharedRingBuffer(self.name, 64, create=True)
+        self.reader = SharedRingBuffer(self.name)
+
+    def test_wrap(self):
+        for i in range(20):
+            payload = bytes([i]) * (5 + i % 7)
+            self.assertTrue(self.writer.write(payload))
+            self.assertEqual(payload, self.reader.read())
+        self.assertIsNone(self.reader.read())
+
+    def test_full(self):
+        self.assertTrue(self.writer.write(b"a" * 28))
+        self.assertTrue(self.writer.write(b"b" * 28))
+        self.assertFalse(self.writer.write(b"c"))
+        self.assertEqual(b"a" * 28, self.reader.read())
+        self.assertTrue(self.writer.write(b"c"))
+        self.assertEqual(b"b" * 28, self.reader.read())
+        self.assertEqual(b"c", self.reader.read())
+
+        with self.assertRaises(ValueError):
+            self.writer.write(b"d" * 61)
+
+    def test_in_use(self):
+        with self.assertRaises(FileExistsError):
+            SharedRingBuffer(self.name, 64, create=True)
+        self.assertTrue(self.writer.write(b"a"))
+        self.assertEqual(b"a", self.reader.read())
+
+    def test_stale(self):
+        # left behind by a crashed server: the owner pid is not running
+        name = f"test_stale_{os.getpid()}"
+        stale = SharedMemory(name=name, create=True, size=DATA_OFFSET + 64)
+        POSITION.pack_into(stale.buf, OWNER_OFFSET, 0)
+        stale.close()
+
+        ring = SharedRingBuffer(name, 128, create=True)
+        self.assertEqual(128, ring.capacity)
+        ring.close()
+
+    def tearDown(self) -> None:
+        self.reader.close()
+        self.writer.close()
+
+
+class TestEventBus(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.main_engine = DummyMainEngine()
+        self.event_engine = EventEngine()
+        name = f"test_bus_{os.getpid()}"
+        self.server = EventBusServer(self.main_engine, self.event_engine, name, size=1024 * 1024)
+        self.client = EventBusClient(name)
+        self.server.start()
+        self.event_engine.start()
+
+    def test_mirror_events(self):
+        tick = TickData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI,
+                        datetime=datetime.now(), last_price=100)
+        self.event_engine.put(Event(EVENT_TICK + tick.vt_symbol, tick))
+        self.event_engine.put(Event("eLog", "not mirrored"))
+
+        event = self.client.poll(timeout=1)
+        self.assertEqual("eTick.btcusdt.HUOBI", event.type)
+        self.assertEqual(tick, event.data)
+        self.assertIsNone(self.client.poll(timeout=0.05))
+
+    def test_route_requests(self):
+        req = OrderRequest(symbol="btcusdt", exchange=Exchange.HUOBI, direction=Direction.LONG,
+                           type=OrderType.LIMIT, volume=1, price=100)
+        request_id = self.client.send_order(req, "HUOBI")
+
+        event = self.client.poll(timeout=1)
+        self.assertEqual(EVENT_BUS_REPLY, event.type)
+        self.assertEqual((request_id, "HUOBI.1"), event.data)
+        self.assertEqual([req], self.main_engine.orders)
+
+        cancel = CancelRequest(orderid="1", symbol="btcusdt", exchange=Exchange.HUOBI)
+        self.client.cancel_order(cancel, "HUOBI")
+        for _ in range(100):
+            if self.main_engine.cancels:
+                break
+            sleep(0.01)
+        self.assertEqual([cancel], self.main_engine.cancels)
+
+    def test_second_server(self):
+        name = f"test_bus_{os.getpid()}"
+        with self.assertRaises(FileExistsError):
+            EventBusServer(self.main_engine, self.event_engine, name)
+
+        other = EventBusServer(self.main_engine, self.event_engine, name + "_b", size=1024)
+        client = EventBusClient(name + "_b")
+        self.assertEqual(1024, client.event_ring.capacity)
+        client.close()
+        other.close()
+
+    def tearDown(self) -> None:
+        self.event_engine.stop()
+        self.client.close()
+        self.server.close()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
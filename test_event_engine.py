@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 import unittest
+from threading import Thread, current_thread
+from time import monotonic, sleep
 
 from event_engine import *
 
@@ -70,6 +72,320 @@ class TestEngine(unittest.TestCase):
         print(engine._thread.is_alive())
         print(engine._timer.is_alive())
 
+    def test_sharded_dispatch(self):
+        class Data:
+            def __init__(self, vt_symbol: str, seq: int):
+                self.vt_symbol = vt_symbol
+                self.seq = seq
+
+        received = {}
+        threads = {}
+
+        def on_data(event: Event) -> None:
+            data = event.data
+            received.setdefault(data.vt_symbol, []).append(data.seq)
+            threads.setdefault(data.vt_symbol, set()).add(current_thread().name)
+
+        engine = EventEngine(workers=4)
+        self.assertEqual(4, len(engine._queues))
+        engine.register("Data", on_data)
+        engine.start()
+
+        symbols = [f"sym{i}.HUOBI" for i in range(8)]
+        for seq in range(100):
+            for vt_symbol in symbols:
+                engine.put(Event("Data", Data(vt_symbol, seq)))
+
+        for _ in range(100):
+            if sum(len(v) for v in received.values()) == 800:
+                break
+            sleep(0.05)
+        engine.stop()
+
+        for vt_symbol in symbols:
+            self.assertEqual(list(range(100)), received[vt_symbol])
+            self.assertEqual(1, len(threads[vt_symbol]))
+
+    def test_general_handler(self):
+        received = []
+        engine = EventEngine()
+        engine.register_general(lambda event: received.append(event.type))
+        engine._process(Event("Test"))
+        self.assertEqual(["Test"], received)
+
+    def test_conflation(self):
+        class Data:
+            def __init__(self, vt_symbol: str, seq: int):
+                self.vt_symbol = vt_symbol
+                self.seq = seq
+
+        engine = EventEngine()
+        engine.set_conflation("Tick")
+        for seq in range(10):
+            engine.put(Event("Tick", Data("a.HUOBI", seq)))
+            engine.put(Event("Tick", Data("b.HUOBI", seq)))
+            engine.put(Event("Order", Data("a.HUOBI", seq)))
+
+        self.assertEqual(12, engine._queue.qsize())
+        self.assertEqual(18, engine.get_conflated_count("Tick"))
+        self.assertEqual(0, engine.get_conflated_count("Order"))
+
+        first = engine._queue.get(block=False)
+        second = engine._queue.get(block=False)
+        self.assertEqual(("a.HUOBI", 9), (first.data.vt_symbol, first.data.seq))
+        self.assertEqual(("b.HUOBI", 9), (second.data.vt_symbol, second.data.seq))
+
+        engine.put(Event("Tick", Data("a.HUOBI", 10)))
+        self.assertEqual(11, engine._queue.qsize())
+
+    def test_queue_policy(self):
+        engine = EventEngine(maxsize=3)
+        engine.set_queue_policy("Log", QueuePolicy.DROP_NEWEST)
+        engine.set_queue_policy("Tick", QueuePolicy.DROP_OLDEST)
+
+        self.assertTrue(engine.put(Event("Tick", 1)))
+        self.assertTrue(engine.put(Event("Log", 1)))
+        self.assertTrue(engine.put(Event("Tick", 2)))
+        self.assertFalse(engine.put(Event("Log", 2)))
+        self.assertTrue(engine.put(Event("Tick", 3)))
+
+        self.assertEqual(3, engine.get_high_water())
+        self.assertEqual(1, engine.get_dropped_count("Log"))
+        self.assertEqual(1, engine.get_dropped_count("Tick"))
+
+        events = [engine._queue.get(block=False) for _ in range(3)]
+        self.assertEqual([("Log", 1), ("Tick", 2), ("Tick", 3)], [(e.type, e.data) for e in events])
+
+    def test_queue_policy_block(self):
+        engine = EventEngine(maxsize=1)
+        engine.put(Event("Test", 1))
+
+        producer = Thread(target=engine.put, args=(Event("Test", 2),))
+        producer.start()
+        producer.join(timeout=0.1)
+        self.assertTrue(producer.is_alive())
+
+        self.assertEqual(1, engine._queue.get(block=False).data)
+        producer.join(timeout=1)
+        self.assertFalse(producer.is_alive())
+        self.assertEqual(2, engine._queue.get(block=False).data)
+
+    def test_queue_policy_reentrant(self):
+        # a handler putting into its own full queue must not deadlock the worker
+        received = []
+        engine = EventEngine(maxsize=1)
+        engine.register("Test", lambda event: [engine.put(Event("Again", i)) for i in range(3)])
+        engine.register("Again", lambda event: received.append(event.data))
+        engine.start()
+        engine.put(Event("Test"))
+
+        deadline = monotonic() + 2
+        while len(received) < 3 and monotonic() < deadline:
+            sleep(0.01)
+        engine.stop()
+        self.assertEqual([0, 1, 2], received)
+
+    def test_stats(self):
+        engine = EventEngine()
+        engine.register("Test", lambda event: sleep(0.01))
+        engine.register("Test", self.call)
+        engine.put(Event("Test"))
+        engine._process(engine._queue.get(block=False))
+        self.assertEqual({}, engine.get_stats())
+
+        engine.enable_stats()
+        for _ in range(3):
+            engine.put(Event("Test"))
+            engine._process(engine._queue.get(block=False))
+
+        stats = engine.get_stats()
+        self.assertEqual(3, stats["wait"]["Test"]["count"])
+        handlers = stats["handlers"]["Test"]
+        self.assertEqual(3, handlers["TestEngine.call"]["count"])
+        slow = [v for k, v in handlers.items() if "lambda" in k][0]
+        self.assertGreaterEqual(slow["p50"], 0.009)
+
+        engine.reset_stats()
+        self.assertEqual({"wait": {}, "handlers": {}}, engine.get_stats())
+
+    def test_prefix_dispatch(self):
+        received = []
+        engine = EventEngine()
+        engine.register("eTick.", lambda event: received.append(("all", event.type)))
+        engine.register("eTick.a.HUOBI", lambda event: received.append(("a", event.type)))
+        engine.register("eTickOther", lambda event: received.append(("other", event.type)))
+
+        engine._process(Event("eTick.a.HUOBI"))
+        engine._process(Event("eTick.b.HUOBI"))
+        engine._process(Event("eTick."))
+        self.assertEqual(
+            [("all", "eTick.a.HUOBI"), ("a", "eTick.a.HUOBI"), ("all", "eTick.b.HUOBI"), ("all", "eTick.")],
+            received
+        )
+
+        received.clear()
+        engine.unregister("eTick.", engine._handlers["eTick."][0])
+        engine._process(Event("eTick.a.HUOBI"))
+        engine._process(Event("eTick.b.HUOBI"))
+        self.assertEqual([("a", "eTick.a.HUOBI")], received)
+
+    def test_prefix_policy(self):
+        class Data:
+            def __init__(self, vt_symbol: str):
+                self.vt_symbol = vt_symbol
+
+        engine = EventEngine()
+        engine.set_conflation("eTick.")
+        for _ in range(5):
+            engine.put(Event("eTick.a.HUOBI", Data("a.HUOBI")))
+            engine.put(Event("eTick.b.HUOBI", Data("b.HUOBI")))
+
+        self.assertEqual(2, engine._queue.qsize())
+        self.assertEqual(8, engine.get_conflated_count("eTick."))
+        # counted per registered type, not per symbol
+        self.assertEqual(["eTick."], list(engine._queue.conflated_count))
+
+    def test_prefix_drop_oldest(self):
+        engine = EventEngine(maxsize=3)
+        engine.set_queue_policy("eTick.", QueuePolicy.DROP_OLDEST)
+        for symbol in "abcd":
+            self.assertTrue(engine.put(Event(f"eTick.{symbol}.HUOBI")))
+
+        types = [engine._queue.get(block=False).type for _ in range(3)]
+        self.assertEqual(["eTick.b.HUOBI", "eTick.c.HUOBI", "eTick.d.HUOBI"], types)
+        self.assertEqual(1, engine.get_dropped_count("eTick."))
+
+    def test_route_caches(self):
+        engine = EventEngine(maxsize=5)
+        engine.register("eOrder.", lambda event: None)
+        engine.set_priority("eOrder.", EventPriority.CRITICAL)
+        engine.set_queue_policy("eOrder.", QueuePolicy.DROP_NEWEST)
+        engine.enable_stats()
+
+        for i in range(100):
+            for j in range(6):
+                engine.put(Event(f"eOrder.HUOBI.{i}.{j}"))
+            engine._process(engine._queue.get(block=False))
+            engine.put(Event(f"eOther.{i}"))
+            while not engine._queue.empty():
+                engine._process(engine._queue.get(block=False))
+
+        self.assertEqual({"eOrder.", ""}, set(engine._dispatch))
+        self.assertEqual({"eOrder.", ""}, set(engine._policy_cache))
+        self.assertEqual({"eOrder.", ""}, set(engine._priority_cache))
+        self.assertEqual(["eOrder."], list(engine._queue.dropped_count))
+        self.assertEqual({"eOrder.", ""}, set(engine.get_stats()["wait"]))
+        self.assertEqual(["eOrder."], list(engine.get_stats()["handlers"]))
+
+    def test_priority(self):
+        engine = EventEngine(starvation_limit=2)
+        engine.set_priority("eOrder.", EventPriority.CRITICAL)
+        engine.set_priority("eLog", EventPriority.LOW)
+
+        for i in range(3):
+            engine.put(Event("eLog", i))
+        for i in range(5):
+            engine.put(Event("eTick.a.HUOBI", i))
+        engine.put(Event("eOrder.HUOBI.1", 0))
+
+        events = [engine._queue.get(block=False) for _ in range(9)]
+        self.assertEqual(
+            [
+                ("eOrder.HUOBI.1", 0),
+                ("eTick.a.HUOBI", 0),
+                ("eLog", 0),
+                ("eTick.a.HUOBI", 1),
+                ("eTick.a.HUOBI", 2),
+                ("eLog", 1),
+                ("eTick.a.HUOBI", 3),
+                ("eTick.a.HUOBI", 4),
+                ("eLog", 2),
+            ],
+            [(e.type, e.data) for e in events]
+        )
+        self.assertTrue(engine._queue.empty())
+
+    def test_register_batch(self):
+        batches = []
+        engine = EventEngine()
+        engine.register_batch("eTick.", lambda events: batches.append([e.data for e in events]), max_batch=3)
+
+        for i in range(4):
+            engine._process(Event("eTick.a.HUOBI", i))
+        engine._process(Event("eLog", 0))
+        self.assertEqual([[0, 1, 2]], batches)
+
+        engine._flush_batches(0)
+        self.assertEqual([[0, 1, 2], [3]], batches)
+
+        engine.unregister_batch("eTick.", engine._batch_handlers["eTick."][0].handler)
+        self.assertEqual({}, engine._batch_handlers)
+
+    def test_register_batch_running(self):
+        received = []
+        engine = EventEngine()
+        engine.register_batch("Test", received.append)
+        for i in range(100):
+            engine.put(Event("Test", i))
+        engine.start()
+
+        for _ in range(100):
+            if sum(len(batch) for batch in received) == 100:
+                break
+            sleep(0.01)
+        engine.stop()
+
+        self.assertEqual(list(range(100)), [e.data for batch in received for e in batch])
+        self.assertLess(len(received), 100)
+
+    def test_stop_wakeup(self):
+        engine = EventEngine()
+        engine.start()
+        sleep(0.05)
+
+        start = monotonic()
+        engine.stop()
+        self.assertLess(monotonic() - start, 0.5)
+        self.assertFalse(engine._thread.is_alive())
+        self.assertFalse(engine._timer.is_alive())
+
+    def test_stop_drain(self):
+        received = []
+        engine = EventEngine()
+
+        def slow(event: Event) -> None:
+            sleep(0.001)
+            received.append(event.data)
+
+        engine.register("Test", slow)
+        engine.start()
+        for i in range(200):
+            engine.put(Event("Test", i))
+        engine.stop(drain=True)
+        self.assertEqual(list(range(200)), received)
+
+        engine.start()
+        engine.put(Event("Test", 200))
+        engine.stop(drain=True)
+        self.assertEqual(list(range(201)), received)
+
+    def test_add_timer(self):
+        received = []
+        engine = EventEngine(interval=0.02)
+        engine.register(EVENT_TIMER, lambda event: received.append(event.type))
+        engine.register("Timeout", lambda event: received.append(event.data))
+        engine.start()
+
+        engine.add_timer(0.005, "Timeout", "order-1", repeat=False)
+        timer_id = engine.add_timer(0.5, "Timeout", "order-2", repeat=False)
+        self.assertTrue(engine.cancel_timer(timer_id))
+
+        sleep(0.15)
+        engine.stop()
+        self.assertIn("order-1", received)
+        self.assertNotIn("order-2", received)
+        self.assertGreaterEqual(received.count(EVENT_TIMER), 4)
+
 
 if __name__ == '__main__':
     unittest.main(verbosity=2)
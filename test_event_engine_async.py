@@ -0,0 +1,72 @@
+import asyncio
+import unittest
+from threading import Thread
+from time import sleep
+
+from event_engine_async import *
+
+
+class TestAsyncEventEngine(unittest.TestCase):
+
+    def test_own_loop(self):
+        received = []
+
+        async def on_async(event: Event) -> None:
+            await asyncio.sleep(0)
+            received.append(("async", event.data))
+
+        engine = AsyncEventEngine()
+        engine.register("eTick.", lambda event: received.append(("sync", event.data)))
+        engine.register("eTick.a.HUOBI", on_async)
+        engine.start()
+
+        producers = [
+            Thread(target=engine.put, args=(Event("eTick.a.HUOBI", i),)) for i in range(10)
+        ]
+        for producer in producers:
+            producer.start()
+        for producer in producers:
+            producer.join()
+
+        engine.stop(drain=True)
+        self.assertEqual(10, len([r for r in received if r[0] == "sync"]))
+        self.assertEqual(10, len([r for r in received if r[0] == "async"]))
+
+    def test_shared_loop(self):
+        received = []
+
+        async def main() -> None:
+            engine = AsyncEventEngine(interval=0.01, loop=asyncio.get_running_loop())
+            engine.register(EVENT_TIMER, lambda event: received.append(event.type))
+            engine.register("Timeout", lambda event: received.append(event.data))
+            engine.start()
+
+            engine.add_timer(0.02, "Timeout", "order-1", repeat=False)
+            Thread(target=engine.put, args=(Event("Timeout", "from-thread"),)).start()
+            await asyncio.sleep(0.1)
+
+            engine.stop()
+            await engine.wait_closed()
+
+        asyncio.run(main())
+        self.assertIn("order-1", received)
+        self.assertIn("from-thread", received)
+        self.assertGreaterEqual(received.count(EVENT_TIMER), 3)
+
+    def test_stop_restart(self):
+        received = []
+        engine = AsyncEventEngine()
+        engine.register("Test", lambda event: received.append(event.data))
+        engine.start()
+        engine.put(Event("Test", 1))
+        sleep(0.05)
+        engine.stop()
+
+        engine.start()
+        engine.put(Event("Test", 2))
+        engine.stop(drain=True)
+        self.assertEqual([1, 2], received)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
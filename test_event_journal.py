@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from time import monotonic, sleep
+
+from event_journal import *
+from trader_constant import Exchange, Status
+from trader_event import EVENT_LOG, EVENT_ORDER
+from trader_gateway import BaseGateway
+from trader_object import OrderData, TickData
+
+
+class DummyGateway(BaseGateway):
+    connect = close = subscribe = send_order = cancel_order = query_account = query_position = None
+
+
+class TestEventJournal(unittest.TestCase):
+
+    def setUp(self) -> None:
+        fd, self.path = tempfile.mkstemp(suffix=".journal")
+        os.close(fd)
+
+    def record(self, events: list) -> None:
+        engine = EventEngine()
+        journal = EventJournal(engine, self.path)
+        journal.start()
+        engine.start()
+        for event in events:
+            engine.put(event)
+        engine.stop(drain=True)
+        journal.close()
+
+    def test_record_and_read(self):
+        tick = TickData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI,
+                        datetime=datetime.now(), last_price=100)
+        self.record([Event("eTick.btcusdt.HUOBI", tick), Event("eLog", "hello"), Event(EVENT_TIMER)])
+
+        records = list(read_journal(self.path))
+        self.assertEqual(["eTick.btcusdt.HUOBI", "eLog"], [event.type for _, event in records])
+        self.assertEqual(tick, records[0][1].data)
+        self.assertLessEqual(records[0][0], records[1][0])
+
+    def test_skip_internal(self):
+        # timer events and derived events are not recorded
+        engine = EventEngine()
+        engine.register("eTrade.", lambda event: engine.put(Event("ePosition.btcusdt.HUOBI", event.data, True)))
+        journal = EventJournal(engine, self.path)
+        journal.start()
+        engine.start()
+        engine.add_timer(0.01, "eCheckpoint", repeat=False)
+        engine.put(Event("eTrade.btcusdt.HUOBI", 1))
+        sleep(0.1)
+        engine.stop(drain=True)
+        journal.close()
+
+        self.assertEqual(["eTrade.btcusdt.HUOBI"], [event.type for _, event in read_journal(self.path)])
+
+    def test_gateway_on_handler_thread(self):
+        # a strategy handler sends an order, the gateway pushes it back on that thread
+        engine = EventEngine()
+        gateway = DummyGateway(engine, "HUOBI")
+
+        def process_signal_event(event: Event) -> None:
+            gateway.on_order(OrderData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI,
+                                       orderid="1", status=Status.SUBMITTING))
+            gateway.write_log("order sent")
+
+        engine.register("eSignal", process_signal_event)
+        journal = EventJournal(engine, self.path)
+        journal.start()
+        engine.start()
+        engine.put(Event("eSignal"))
+        sleep(0.1)
+        engine.stop(drain=True)
+        journal.close()
+
+        types = [event.type for _, event in read_journal(self.path)]
+        self.assertEqual(["eSignal", EVENT_ORDER + "HUOBI.1", EVENT_LOG], types)
+
+    def test_truncated(self):
+        self.record([Event("eLog", i) for i in range(3)])
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+
+        self.assertEqual([0, 1], [event.data for _, event in read_journal(self.path)])
+
+    def test_replay(self):
+        self.record([Event("eLog", i) for i in range(100)])
+
+        received = []
+        engine = EventEngine()
+        engine.register("eLog", lambda event: received.append(event.data))
+        engine.start()
+
+        start = monotonic()
+        self.assertEqual(100, replay_journal(self.path, engine, speed=0))
+        self.assertLess(monotonic() - start, 1)
+        engine.stop(drain=True)
+        self.assertEqual(list(range(100)), received)
+
+    def tearDown(self) -> None:
+        os.remove(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
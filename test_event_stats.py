@@ -0,0 +1,53 @@
+import unittest
+
+from event_stats import *
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_percentile(self):
+        histogram = LatencyHistogram()
+        for i in range(1, 1001):
+            histogram.record(i / 1_000_000)
+
+        self.assertEqual(1000, histogram.count)
+        self.assertAlmostEqual(0.0005005, histogram.mean())
+        self.assertEqual(0.000001, histogram.min)
+        self.assertEqual(0.001, histogram.max)
+        self.assertAlmostEqual(0.0005, histogram.percentile(50), delta=0.0005 / 64)
+        self.assertAlmostEqual(0.00099, histogram.percentile(99), delta=0.00099 / 64)
+
+    def test_merge(self):
+        first = LatencyHistogram()
+        second = LatencyHistogram()
+        first.record(0.001)
+        second.record(0.002)
+        second.record(0.0005)
+        first.merge(second)
+
+        self.assertEqual(3, first.count)
+        self.assertEqual(0.0005, first.min)
+        self.assertEqual(0.002, first.max)
+
+        first.reset()
+        self.assertEqual(0, first.count)
+        self.assertEqual(0, first.percentile(50))
+
+
+class TestRollingHistogram(unittest.TestCase):
+
+    def test_window(self):
+        histogram = RollingHistogram(window=60, slots=6)
+        histogram.record(0.001, now=1000)
+        histogram.record(0.003, now=1015)
+        self.assertEqual(2, histogram.snapshot(now=1055).count)
+
+        # the first slot left the window, the second one is still in
+        self.assertEqual(0.003, histogram.snapshot(now=1065).min)
+        histogram.record(0.002, now=1065)
+        self.assertEqual(2, histogram.to_dict(now=1065)["count"])
+        self.assertEqual(0, histogram.snapshot(now=2000).count)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
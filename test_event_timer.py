@@ -0,0 +1,50 @@
+import unittest
+
+from event_timer import *
+
+
+class TestTimerWheel(unittest.TestCase):
+
+    def test_one_shot(self):
+        fired = []
+        wheel = TimerWheel(tick=0.01, size=8)
+        start = wheel._time
+        wheel.add(0.05, lambda: fired.append("short"))
+        wheel.add(0.25, lambda: fired.append("long"))
+        self.assertEqual(2, len(wheel))
+
+        wheel.advance(start + 0.045)
+        self.assertEqual([], fired)
+        wheel.advance(start + 0.055)
+        self.assertEqual(["short"], fired)
+        wheel.advance(start + 0.245)
+        self.assertEqual(["short"], fired)
+        wheel.advance(start + 0.255)
+        self.assertEqual(["short", "long"], fired)
+        self.assertEqual(0, len(wheel))
+
+    def test_repeat_and_cancel(self):
+        fired = []
+        wheel = TimerWheel(tick=0.01, size=4)
+        start = wheel._time
+        timer_id = wheel.add(0.03, lambda: fired.append(1), repeat=True)
+
+        self.assertEqual(3, wheel.advance(start + 0.095))
+        self.assertEqual(3, len(fired))
+
+        self.assertTrue(wheel.cancel(timer_id))
+        self.assertFalse(wheel.cancel(timer_id))
+        wheel.advance(start + 0.5)
+        self.assertEqual(3, len(fired))
+
+    def test_next_delay(self):
+        wheel = TimerWheel(tick=0.01, size=100)
+        start = wheel._time
+        self.assertAlmostEqual(1.0, wheel.next_delay(start))
+
+        wheel.add(0.2, lambda: None)
+        self.assertAlmostEqual(0.2, wheel.next_delay(start), delta=0.011)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
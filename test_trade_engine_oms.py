@@ -1,8 +1,11 @@
 import unittest
 from datetime import datetime
+from threading import Thread
+from time import sleep
 
-from trader_constant import Exchange
+from trader_constant import Exchange, Product, Status
 from trader_engine_omsengine import *
+from trader_utitlity import get_file_path
 
 
 class Test2Engine(BaseEngine):
@@ -23,8 +26,8 @@ class MyTestCase(unittest.TestCase):
         # print(handlers)
         # for k, v in handlers.items():
         #     print(f"{k}-{v}")
-        self.assertEqual([EVENT_TICK, EVENT_ORDER, EVENT_TRADE, EVENT_POSITION, EVENT_ACCOUNT, EVENT_CONTRACT],
-                         list(handlers.keys()))
+        self.assertEqual([EVENT_TICK, EVENT_ORDER, EVENT_TRADE, EVENT_POSITION, EVENT_ACCOUNT, EVENT_CONTRACT,
+                          EVENT_CONTRACTS], list(handlers.keys()))
 
     def test_tickevent(self):
         tickdata = TickData(gateway_name='lqw', symbol='LQW_USDT', exchange=Exchange.HUOBI, datetime=datetime.now())
@@ -61,8 +64,254 @@ class MyTestCase(unittest.TestCase):
 
         self.assertEqual(self.oms_engine.get_tick(tickdata.vt_symbol), tickdata)
 
+    def test_order_indexes(self):
+        first = OrderData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, orderid='1',
+                          reference='grid')
+        second = OrderData(gateway_name='HUOBI', symbol='ethusdt', exchange=Exchange.HUOBI, orderid='2',
+                           reference='grid')
+        third = OrderData(gateway_name='OKEX', symbol='btcusdt', exchange=Exchange.HUOBI, orderid='3')
+        for order in (first, second, third):
+            self.oms_engine.process_order_event(Event(EVENT_ORDER, order))
+
+        self.assertEqual([first, third], self.oms_engine.get_all_active_orders('btcusdt.HUOBI'))
+        self.assertEqual([first, second], self.oms_engine.get_orders_by_gateway('HUOBI'))
+        self.assertEqual([first, second], self.main_engine.get_orders_by_reference('grid'))
+
+        filled = OrderData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, orderid='1',
+                           reference='grid', status=Status.ALLTRADED)
+        self.oms_engine.process_order_event(Event(EVENT_ORDER, filled))
+        self.assertEqual([third], self.oms_engine.get_all_active_orders('btcusdt.HUOBI'))
+        self.assertEqual([filled, second], self.oms_engine.get_orders_by_gateway('HUOBI'))
+
+        trade = TradeData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, orderid='1', tradeid='9')
+        self.oms_engine.process_trade_event(Event(EVENT_TRADE, trade))
+        self.assertEqual([trade], self.oms_engine.get_trades_by_order('HUOBI.1'))
+        self.assertEqual([], self.oms_engine.get_trades_by_order('HUOBI.2'))
+
+    def test_retention(self):
+        self.oms_engine.set_retention(count=2, archive="test_oms_archive")
+        orders = [
+            OrderData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, orderid=str(n),
+                      reference='grid', status=Status.ALLTRADED)
+            for n in range(4)
+        ]
+        active = OrderData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, orderid='9')
+        for order in [active] + orders:
+            self.oms_engine.process_order_event(Event(EVENT_ORDER, order))
+
+        self.assertEqual(['HUOBI.9', 'HUOBI.2', 'HUOBI.3'], list(self.oms_engine.orders))
+        self.assertEqual([active, orders[2], orders[3]], self.oms_engine.get_orders_by_gateway('HUOBI'))
+        self.assertEqual(orders[0], self.oms_engine.get_order('HUOBI.0'))
+        self.assertIsNone(self.oms_engine.get_order('HUOBI.5'))
+
+        for n in range(3):
+            trade = TradeData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, orderid='3',
+                              tradeid=str(n))
+            self.oms_engine.process_trade_event(Event(EVENT_TRADE, trade))
+        self.assertEqual(['HUOBI.1', 'HUOBI.2'], list(self.oms_engine.trades))
+        self.assertEqual('HUOBI.0', self.oms_engine.get_trade('HUOBI.0').vt_tradeid)
+
+        self.oms_engine.set_retention(age=0.001)
+        sleep(0.01)
+        self.oms_engine.process_order_event(Event(EVENT_ORDER, orders[0]))
+        self.assertEqual(['HUOBI.9', 'HUOBI.0'], list(self.oms_engine.orders))
+        self.oms_engine.set_retention()
+
+    def test_retention_trades(self):
+        self.oms_engine.set_retention(count=1)
+        orders = [
+            OrderData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, orderid=str(n),
+                      status=Status.ALLTRADED)
+            for n in range(2)
+        ]
+        trade = TradeData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, orderid='0', tradeid='0')
+        self.oms_engine.process_order_event(Event(EVENT_ORDER, orders[0]))
+        self.oms_engine.process_trade_event(Event(EVENT_TRADE, trade))
+        self.assertEqual([trade], self.oms_engine.get_trades_by_order('HUOBI.0'))
+
+        # the evicted order takes its trades with it
+        self.oms_engine.process_order_event(Event(EVENT_ORDER, orders[1]))
+        self.assertEqual([], self.oms_engine.get_trades_by_order('HUOBI.0'))
+        self.assertEqual({}, self.oms_engine.trades)
+        self.assertEqual(0, len(self.oms_engine.trade_times))
+
+    def test_retention_timer(self):
+        order = OrderData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, orderid='0',
+                          status=Status.ALLTRADED)
+        self.event_engine.stop()
+        self.oms_engine.set_retention(age=0.01)
+        self.assertIn(self.oms_engine.process_timer_event, self.event_engine._handlers[EVENT_TIMER])
+        self.oms_engine.process_order_event(Event(EVENT_ORDER, order))
+
+        # nothing else happens, the timer alone expires the order
+        sleep(0.02)
+        self.oms_engine.process_timer_event(Event(EVENT_TIMER))
+        self.assertEqual({}, self.oms_engine.orders)
+
+        self.oms_engine.set_retention()
+        self.assertNotIn(EVENT_TIMER, self.event_engine._handlers)
+
+    def test_snapshot_and_changes(self):
+        orders = [
+            OrderData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, orderid=str(n))
+            for n in range(3)
+        ]
+        for order in orders[:2]:
+            self.oms_engine.process_order_event(Event(EVENT_ORDER, order))
+
+        snapshot = self.oms_engine.get_all_orders()
+        self.assertEqual((orders[0], orders[1]), snapshot)
+        self.assertIs(snapshot, self.main_engine.get_all_orders())
+        version, changes = self.oms_engine.get_changes(ORDER)
+        self.assertEqual([(order.vt_orderid, order) for order in orders[:2]], changes)
+        active_version = self.oms_engine.get_changes(ACTIVE_ORDER)[0]
+
+        self.oms_engine.process_order_event(Event(EVENT_ORDER, orders[2]))
+        filled = OrderData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, orderid='0',
+                           status=Status.ALLTRADED)
+        self.oms_engine.process_order_event(Event(EVENT_ORDER, filled))
+
+        self.assertEqual((orders[0], orders[1]), snapshot)
+        self.assertEqual((filled, orders[1], orders[2]), self.oms_engine.get_all_orders())
+        self.assertEqual((orders[1], orders[2]), self.oms_engine.get_all_active_orders())
+
+        version, changes = self.main_engine.get_changes(ORDER, version)
+        self.assertEqual([('HUOBI.2', orders[2]), ('HUOBI.0', filled)], changes)
+        self.assertEqual([], self.oms_engine.get_changes(ORDER, version)[1])
+
+        # the order that left the active set comes back as a tombstone
+        changes = self.oms_engine.get_changes(ACTIVE_ORDER, active_version)[1]
+        self.assertEqual([('HUOBI.2', orders[2]), ('HUOBI.0', None)], changes)
+
+    def test_changes_mid_write(self):
+        # a change logged but not yet published is returned with its version
+        order = OrderData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, orderid='1')
+        self.oms_engine.orders[order.vt_orderid] = order
+        self.oms_engine.change_logs[ORDER].append((self.oms_engine.version + 1, order.vt_orderid))
+
+        version, changes = self.oms_engine.get_changes(ORDER)
+        self.assertEqual(self.oms_engine.version + 1, version)
+        self.assertEqual([(order.vt_orderid, order)], changes)
+
+    def test_changes_concurrent(self):
+        # handlers of several worker threads log changes at once
+        def write(n: int) -> None:
+            for i in range(2000):
+                self.oms_engine.changed(ORDER, f"{n}.{i}")
+
+        threads = [Thread(target=write, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        versions = [version for version, _ in self.oms_engine.change_logs[ORDER]]
+        self.assertEqual(list(range(1, 8001)), versions)
+        self.assertEqual(8000, self.oms_engine.version)
+
+    def test_contracts_event(self):
+        contracts = [ContractData(gateway_name='HUOBI', symbol=symbol, exchange=Exchange.HUOBI, name=symbol,
+                                  product=Product.SPOT, size=1, pricetick=0.01) for symbol in ('btcusdt', 'ethusdt')]
+        version = self.oms_engine.get_changes(CONTRACT, 0)[0]
+
+        self.oms_engine.process_contracts_event(Event(EVENT_CONTRACTS, contracts))
+        self.assertEqual(tuple(contracts), self.main_engine.get_all_contracts())
+        self.assertEqual(contracts[1], self.main_engine.get_contract('ethusdt.HUOBI'))
+        self.assertEqual([(contract.vt_symbol, contract) for contract in contracts],
+                         self.oms_engine.get_changes(CONTRACT, version)[1])
+
+    def test_checkpoint(self):
+        contract = ContractData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, name='btcusdt',
+                                product=Product.SPOT, size=1, pricetick=0.01)
+        active = OrderData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, orderid='1')
+        filled = OrderData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, orderid='2',
+                           status=Status.ALLTRADED)
+        account = AccountData(gateway_name='HUOBI', accountid='usdt', balance=100)
+
+        self.oms_engine.process_contract_event(Event(EVENT_CONTRACT, contract))
+        self.oms_engine.process_order_event(Event(EVENT_ORDER, active))
+        self.oms_engine.process_order_event(Event(EVENT_ORDER, filled))
+        self.oms_engine.process_account_event(Event(EVENT_ACCOUNT, account))
+
+        self.oms_engine.checkpoint_path = str(get_file_path("test_oms_checkpoint"))
+        self.assertTrue(self.oms_engine.save_checkpoint())
+        self.assertFalse(self.oms_engine.save_checkpoint())
+
+        oms_engine = OmsEngine(main_engine=Test2Engine(), event_engine=self.event_engine)
+        self.assertEqual(3, oms_engine.start_checkpoint("test_oms_checkpoint"))
+        oms_engine.close()
+
+        self.assertEqual(contract, oms_engine.get_contract('btcusdt.HUOBI'))
+        self.assertEqual(account, oms_engine.get_account('HUOBI.usdt'))
+        # restored orders wait for the gateway before they are active again
+        self.assertEqual((), oms_engine.get_all_active_orders())
+        self.assertIsNone(oms_engine.get_order('HUOBI.2'))
+        self.assertEqual([active], oms_engine.get_unconfirmed_orders())
+
+        oms_engine.process_order_event(Event(EVENT_ORDER, active))
+        self.assertEqual([], oms_engine.get_unconfirmed_orders())
+        self.assertEqual((active,), oms_engine.get_all_active_orders())
+
+    def test_checkpoint_reconcile(self):
+        orders = [OrderData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, orderid=str(n))
+                  for n in range(2)]
+        for order in orders:
+            self.oms_engine.process_order_event(Event(EVENT_ORDER, order))
+        self.oms_engine.checkpoint_path = str(get_file_path("test_oms_checkpoint"))
+        self.oms_engine.save_checkpoint()
+
+        oms_engine = OmsEngine(main_engine=Test2Engine(), event_engine=self.event_engine)
+        oms_engine.start_checkpoint("test_oms_checkpoint")
+
+        # only order 0 is still open at the exchange
+        oms_engine.process_order_event(Event(EVENT_ORDER, orders[0]))
+        oms_engine.process_orders_synced_event(Event(EVENT_ORDERS_SYNCED, 'HUOBI'))
+        self.assertEqual([], oms_engine.get_unconfirmed_orders())
+        self.assertEqual((orders[0],), oms_engine.get_all_active_orders())
+
+        oms_engine.save_checkpoint()
+        oms_engine.close()
+        restored = OmsEngine(main_engine=Test2Engine(), event_engine=self.event_engine)
+        self.assertEqual(1, restored.start_checkpoint("test_oms_checkpoint"))
+        restored.close()
+
+    def test_checkpoint_encode_error(self):
+        account = AccountData(gateway_name='HUOBI', accountid='usdt', balance=100)
+        broken = OrderData(gateway_name='HUOBI', symbol='btcusdt', exchange=Exchange.HUOBI, orderid='1',
+                           traded=Status.NOTTRADED)
+        self.oms_engine.process_account_event(Event(EVENT_ACCOUNT, account))
+        self.oms_engine.process_order_event(Event(EVENT_ORDER, broken))
+
+        self.oms_engine.checkpoint_path = str(get_file_path("test_oms_checkpoint"))
+        self.assertTrue(self.oms_engine.save_checkpoint())
+
+        oms_engine = OmsEngine(main_engine=Test2Engine(), event_engine=self.event_engine)
+        self.assertEqual(1, oms_engine.start_checkpoint("test_oms_checkpoint"))
+        oms_engine.close()
+        self.assertEqual(account, oms_engine.get_account('HUOBI.usdt'))
+
+    def test_checkpoint_unreadable(self):
+        account = AccountData(gateway_name='HUOBI', accountid='usdt', balance=100)
+        self.oms_engine.process_account_event(Event(EVENT_ACCOUNT, account))
+        self.oms_engine.checkpoint_path = str(get_file_path("test_oms_checkpoint"))
+        self.oms_engine.save_checkpoint()
+        with open(self.oms_engine.checkpoint_path, "rb") as f:
+            payload = f.read()
+
+        # empty after a power loss, truncated, and from another codec version
+        for broken in (b"", payload[:-3], b"\xff" + payload[1:]):
+            with open(self.oms_engine.checkpoint_path, "wb") as f:
+                f.write(broken)
+            oms_engine = OmsEngine(main_engine=Test2Engine(), event_engine=self.event_engine)
+            self.assertEqual(0, oms_engine.start_checkpoint("test_oms_checkpoint"))
+            oms_engine.close()
+            self.assertEqual((), oms_engine.get_all_accounts())
+
     def tearDown(self) -> None:
         self.oms_engine.event_engine.stop()
+        self.oms_engine.close()
+        for path in get_file_path("").glob("test_oms_*"):
+            path.unlink()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,123 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import numpy as np
+
+from trader_buffer import BarBuffer, TickBuffer
+from trader_constant import Exchange, Interval
+from trader_object import BarData, SymbolRegistry, TickData
+
+START = datetime(2019, 10, 10, 9, 30, tzinfo=timezone.utc)
+
+
+def make_tick(seconds: int, price: float, volume: float, symbol: str = "btcusdt") -> TickData:
+    return TickData(gateway_name="HUOBI", symbol=symbol, exchange=Exchange.HUOBI,
+                    datetime=START + timedelta(seconds=seconds), last_price=price, volume=volume,
+                    bid_price_1=price - 0.5, ask_price_1=price + 0.5)
+
+
+class TestTickBuffer(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.ticks = [
+            make_tick(0, 10, 100),
+            make_tick(20, 12, 110),
+            make_tick(40, 9, 130),
+            make_tick(70, 11, 160),
+        ]
+
+    def test_round_trip(self):
+        buffer = TickBuffer(capacity=1)
+        for tick in self.ticks[:2]:
+            buffer.append(tick)
+        buffer.extend(self.ticks[2:])
+
+        self.assertEqual(4, len(buffer))
+        self.assertEqual([10, 12, 9, 11], buffer.last_price.tolist())
+        self.assertEqual(self.ticks, buffer.to_list())
+        self.assertEqual(self.ticks[-1], buffer[-1])
+
+        part = buffer[1:3]
+        self.assertIsInstance(part, TickBuffer)
+        self.assertEqual(self.ticks[1:3], part.to_list())
+
+    def test_unregistered_symbol(self):
+        # a process that has only seen ethusdt loads pickled btcusdt ticks
+        registry = SymbolRegistry()
+        registry.get_vt_symbol("ethusdt", Exchange.HUOBI)
+        with patch("trader_buffer.symbol_registry", registry):
+            buffer = TickBuffer.from_list(self.ticks[:2])
+            buffer.append(self.ticks[2])
+            self.assertEqual(self.ticks[:3], buffer.to_list())
+
+    def test_helpers(self):
+        buffer = TickBuffer.from_list(self.ticks)
+        self.assertTrue(np.all(buffer.spread() == 1))
+        self.assertEqual([0, 10, 20, 30], buffer.volume_delta().tolist())
+        self.assertAlmostEqual((12 * 10 + 9 * 20 + 11 * 30) / 60, buffer.vwap())
+
+        bars = buffer.resample(Interval.MINUTE)
+        self.assertEqual(2, len(bars))
+        self.assertEqual([10, 11], bars.open_price.tolist())
+        self.assertEqual([12, 11], bars.high_price.tolist())
+        self.assertEqual([9, 11], bars.low_price.tolist())
+        self.assertEqual([9, 11], bars.close_price.tolist())
+        self.assertEqual([30, 30], bars.volume.tolist())
+
+        bar = bars[1]
+        self.assertEqual("btcusdt.HUOBI", bar.vt_symbol)
+        self.assertEqual(Interval.MINUTE, bar.interval)
+        self.assertEqual(START + timedelta(minutes=1), bar.datetime)
+
+    def test_resample_by_symbol(self):
+        ticks = self.ticks[:2] + [make_tick(0, 100, 5, "ethusdt"), make_tick(10, 101, 7, "ethusdt")]
+        bars = TickBuffer.from_list(ticks).resample(Interval.MINUTE)
+
+        self.assertEqual(["btcusdt.HUOBI", "ethusdt.HUOBI"], [bar.vt_symbol for bar in bars.to_list()])
+        self.assertEqual([10, 2], bars.volume.tolist())
+
+    def test_interleaved_symbols(self):
+        # ticks of two symbols in time order, as recorded live
+        ticks = []
+        for tick in self.ticks:
+            seconds = int((tick.datetime - START).total_seconds())
+            ticks.append(tick)
+            ticks.append(make_tick(seconds, tick.last_price * 10, tick.volume / 10, "ethusdt"))
+        buffer = TickBuffer.from_list(ticks)
+
+        self.assertEqual([0, 0, 10, 1, 20, 2, 30, 3], buffer.volume_delta().tolist())
+
+        bars = buffer.resample(Interval.MINUTE)
+        self.assertEqual(["btcusdt.HUOBI"] * 2 + ["ethusdt.HUOBI"] * 2, [bar.vt_symbol for bar in bars.to_list()])
+        self.assertEqual([30, 30, 3, 3], bars.volume.tolist())
+        self.assertEqual([9, 11, 90, 110], bars.close_price.tolist())
+
+
+class TestBarBuffer(unittest.TestCase):
+
+    def test_resample(self):
+        bars = [
+            BarData(gateway_name="DB", symbol="btcusdt", exchange=Exchange.HUOBI, interval=Interval.MINUTE,
+                    datetime=START + timedelta(minutes=i), open_price=i, high_price=i + 2,
+                    low_price=i - 1, close_price=i + 1, volume=10)
+            for i in range(90)
+        ]
+        buffer = BarBuffer.from_list(bars)
+        self.assertEqual(Interval.MINUTE, buffer.interval)
+        self.assertEqual(bars[5], buffer[5])
+
+        hours = buffer.resample(Interval.HOUR)
+        self.assertEqual(2, len(hours))
+        self.assertEqual([0, 30], hours.open_price.tolist())
+        self.assertEqual([31, 91], hours.high_price.tolist())
+        self.assertEqual([-1, 29], hours.low_price.tolist())
+        self.assertEqual([30, 90], hours.close_price.tolist())
+        self.assertEqual([300, 600], hours.volume.tolist())
+
+        self.assertAlmostEqual(buffer.vwap(), float(np.mean((buffer.high_price + buffer.low_price
+                                                             + buffer.close_price) / 3)))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
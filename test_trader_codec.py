@@ -0,0 +1,76 @@
+import pickle
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from trader_codec import *
+from trader_constant import Direction, Exchange, Interval, Offset, OptionType, OrderType, Product, Status
+from trader_object import (
+    AccountData, BarData, ContractData, LogData, OrderData, PositionData, TickData, TradeData
+)
+
+NOW = datetime(2019, 10, 10, 9, 30, 15, 123456, tzinfo=timezone(timedelta(hours=8)))
+
+
+class TestTraderCodec(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.datas = [
+            TickData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI, datetime=NOW,
+                     name="比特币", last_price=8000.5, volume=12.25, bid_price_1=8000, ask_price_5=8010.1),
+            BarData(gateway_name="DB", symbol="btcusdt", exchange=Exchange.HUOBI, datetime=NOW,
+                    interval=Interval.MINUTE, open_price=1, high_price=2, low_price=0.5, close_price=1.5),
+            OrderData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI, orderid="1",
+                      type=OrderType.LIMIT, direction=Direction.LONG, offset=Offset.OPEN, price=8000,
+                      volume=1, traded=0.5, status=Status.PARTTRADED, reference="test"),
+            TradeData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI, orderid="1",
+                      tradeid="2", direction=Direction.LONG, price=8000, volume=0.5, datetime=NOW),
+            PositionData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI,
+                         direction=Direction.NET, volume=0.5, price=8000),
+            ContractData(gateway_name="HUOBI", symbol="btc-call", exchange=Exchange.HUOBI, name="btc call",
+                         product=Product.OPTION, size=1, pricetick=0.01, net_position=True,
+                         option_type=OptionType.CALL, option_expiry=NOW, option_strike=9000),
+            AccountData(gateway_name="HUOBI", accountid="usdt", balance=100, frozen=40),
+        ]
+
+    def test_round_trip(self):
+        for data in self.datas:
+            payload = encode(data)
+            decoded = decode(payload)
+            self.assertEqual(data, decoded)
+            self.assertEqual(type(data), type(decoded))
+            self.assertLess(len(payload), len(pickle.dumps(data, pickle.HIGHEST_PROTOCOL)))
+
+        account = decode(encode(self.datas[-1]))
+        self.assertEqual(60, account.available)
+        self.assertEqual("HUOBI.usdt", account.vt_accountid)
+
+    def test_datetime(self):
+        self.assertEqual(NOW.utcoffset(), decode(encode(self.datas[0])).datetime.utcoffset())
+
+        naive = BarData(gateway_name="DB", symbol="btcusdt", exchange=Exchange.HUOBI, datetime=datetime(2019, 1, 1))
+        self.assertIsNone(decode(encode(naive)).datetime.tzinfo)
+        self.assertIsNone(decode(encode(self.datas[2])).datetime)
+
+    def test_batch(self):
+        payload = bytearray(encode_batch(self.datas))
+        self.assertEqual(self.datas, decode_batch(payload))
+        self.assertEqual(self.datas, decode(memoryview(payload)))
+        self.assertEqual(self.datas[:2], list(iter_batch(payload))[:2])
+
+        payload[0] = CODEC_VERSION + 1
+        with self.assertRaises(ValueError):
+            decode_batch(payload)
+
+    def test_data_fallback(self):
+        log = LogData(gateway_name="", msg="hello")
+        self.assertEqual(log.msg, decode_data(encode_data(log)).msg)
+        self.assertEqual({"a": 1}, decode_data(encode_data({"a": 1})))
+        self.assertEqual(self.datas[0], decode_data(encode_data(self.datas[0])))
+        self.assertEqual(self.datas, decode_data(encode_data(self.datas)))
+
+        with self.assertRaises(TypeError):
+            encode(log)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,55 @@
+import os
+import unittest
+
+from trader_constant import Exchange, Product
+from trader_contract_cache import ContractCache
+from trader_object import ContractData
+
+
+def make_contract(symbol: str, pricetick: float = 0.01) -> ContractData:
+    return ContractData(gateway_name="HUOBI", symbol=symbol, exchange=Exchange.HUOBI, name=symbol.upper(),
+                        product=Product.SPOT, size=1, pricetick=pricetick, history_data=True)
+
+
+class TestContractCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cache = ContractCache("test_cache", ttl=60)
+        self.cache.clear()
+        self.contracts = [make_contract("btcusdt"), make_contract("ethusdt")]
+
+    def tearDown(self) -> None:
+        self.cache.clear()
+
+    def test_load(self):
+        self.assertEqual([], self.cache.load())
+        self.assertFalse(self.cache.is_fresh())
+
+        self.assertEqual(self.contracts, self.cache.update(self.contracts))
+        self.assertTrue(os.path.exists(self.cache.path))
+
+        cache = ContractCache("test_cache", ttl=60)
+        self.assertEqual(self.contracts, sorted(cache.load(), key=lambda contract: contract.symbol))
+        self.assertTrue(cache.is_fresh())
+        self.assertFalse(cache.is_fresh(cache.saved + 61))
+
+    def test_diff(self):
+        self.cache.update(self.contracts)
+        cache = ContractCache("test_cache")
+        cache.load()
+
+        self.assertEqual([], cache.update(list(reversed(self.contracts))))
+
+        changed = make_contract("ethusdt", pricetick=0.1)
+        added = make_contract("xrpusdt")
+        self.assertEqual([changed, added], cache.update([self.contracts[0], changed, added]))
+        self.assertEqual(3, len(ContractCache("test_cache").load()))
+
+    def test_corrupt(self):
+        with open(self.cache.path, "wb") as f:
+            f.write(b"\x00\x01")
+        self.assertEqual([], self.cache.load())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
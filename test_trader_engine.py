@@ -7,6 +7,8 @@ class TestMainEngine(unittest.TestCase):
     def testInit(self):
         main_engine = MainEngine()
         print(main_engine)
+        self.assertEqual(["log", "oms", "email", "position", "latency"], list(main_engine.engines.keys()))
+        main_engine.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+import unittest
+
+from trader_constant import Direction, Exchange, OrderType
+from trader_engine_latency import *
+
+
+class DummyMainEngine:
+
+    def __init__(self):
+        self.count = 0
+        self.cancelled = []
+
+    def send_order(self, req: OrderRequest, gateway_name: str) -> str:
+        self.count += 1
+        return f"{gateway_name}.{self.count}"
+
+    def send_orders(self, reqs, gateway_name: str) -> list:
+        return [self.send_order(req, gateway_name) for req in reqs]
+
+    def cancel_order(self, req: CancelRequest, gateway_name: str) -> None:
+        self.cancelled.append(req.orderid)
+
+    def cancel_orders(self, reqs, gateway_name: str) -> None:
+        for req in reqs:
+            self.cancel_order(req, gateway_name)
+
+
+def order_event(orderid: str, status: Status, traded: float = 0, put_time: float = 0) -> Event:
+    order = OrderData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI, orderid=orderid,
+                      volume=1, traded=traded, status=status)
+    event = Event(EVENT_ORDER + order.vt_symbol, order)
+    if put_time:
+        event.put_time = put_time
+    return event
+
+
+class TestLatencyEngine(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.main_engine = DummyMainEngine()
+        self.engine = LatencyEngine(self.main_engine, EventEngine())
+        self.req = OrderRequest(symbol="btcusdt", exchange=Exchange.HUOBI, direction=Direction.LONG,
+                                type=OrderType.LIMIT, volume=1, price=100)
+
+    def test_fill(self):
+        self.assertEqual("HUOBI.1", self.main_engine.send_order(self.req, "HUOBI"))
+        sent = self.engine.timings["HUOBI.1"].sent
+
+        self.engine.process_order_event(order_event("1", Status.SUBMITTING, put_time=sent + 1))
+        self.engine.process_order_event(order_event("1", Status.NOTTRADED, put_time=sent + 0.002))
+        self.engine.process_order_event(order_event("1", Status.PARTTRADED, 0.5, put_time=sent + 0.012))
+        self.engine.process_order_event(order_event("1", Status.ALLTRADED, 1, put_time=sent + 0.02))
+        self.assertNotIn("HUOBI.1", self.engine.timings)
+
+        latency = self.main_engine.get_order_latency(gateway_name="HUOBI")
+        ack = latency[SEND_TO_ACK]["HUOBI"]["btcusdt.HUOBI"]
+        fill = latency[ACK_TO_FILL]["HUOBI"]["btcusdt.HUOBI"]
+        self.assertEqual(1, ack["count"])
+        self.assertAlmostEqual(0.002, ack["mean"])
+        self.assertAlmostEqual(0.01, fill["mean"])
+        self.assertNotIn(CANCEL_TO_CONFIRM, latency)
+
+    def test_cancel(self):
+        vt_orderids = self.main_engine.send_orders([self.req, self.req], "HUOBI")
+        self.assertEqual(["HUOBI.1", "HUOBI.2"], vt_orderids)
+
+        cancel_req = CancelRequest(orderid="2", symbol="btcusdt", exchange=Exchange.HUOBI)
+        self.main_engine.cancel_order(cancel_req, "HUOBI")
+        self.assertEqual(["2"], self.main_engine.cancelled)
+        cancel = self.engine.timings["HUOBI.2"].cancel
+
+        self.engine.process_order_event(order_event("2", Status.CANCELLED, put_time=cancel + 0.005))
+        latency = self.engine.get_order_latency(CANCEL_TO_CONFIRM)
+        self.assertEqual([CANCEL_TO_CONFIRM], list(latency))
+        self.assertAlmostEqual(0.005, latency[CANCEL_TO_CONFIRM]["HUOBI"]["btcusdt.HUOBI"]["mean"])
+        self.assertEqual({}, self.engine.get_order_latency(vt_symbol="ethusdt.HUOBI"))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
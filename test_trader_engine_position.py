@@ -0,0 +1,116 @@
+import unittest
+from threading import Event as ThreadEvent
+
+from trader_constant import Direction, Exchange, Product
+from trader_engine_omsengine import OmsEngine
+from trader_engine_position import *
+
+
+class DummyMainEngine:
+    pass
+
+
+def make_trade(direction: Direction, price: float, volume: float, tradeid: str) -> TradeData:
+    return TradeData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI, orderid="1",
+                     tradeid=tradeid, direction=direction, price=price, volume=volume)
+
+
+class TestNetPosition(unittest.TestCase):
+
+    def test_pnl(self):
+        position = NetPosition("HUOBI", "btcusdt", Exchange.HUOBI, "btcusdt.HUOBI", size=2)
+
+        position.update_trade(make_trade(Direction.LONG, 100, 1, "1"))
+        position.update_trade(make_trade(Direction.LONG, 110, 3, "2"))
+        self.assertEqual(4, position.volume)
+        self.assertEqual(107.5, position.price)
+
+        position.last_price = 120
+        self.assertEqual((120 - 107.5) * 4 * 2, position.unrealized_pnl)
+
+        position.update_trade(make_trade(Direction.SHORT, 117.5, 1, "3"))
+        self.assertEqual(3, position.volume)
+        self.assertEqual(107.5, position.price)
+        self.assertEqual(20, position.realized_pnl)
+
+        position.update_trade(make_trade(Direction.SHORT, 100, 5, "4"))
+        self.assertEqual(-2, position.volume)
+        self.assertEqual(100, position.price)
+        self.assertEqual(20 - 7.5 * 3 * 2, position.realized_pnl)
+
+        position.update_trade(make_trade(Direction.LONG, 90, 2, "5"))
+        self.assertEqual(0, position.volume)
+        self.assertEqual(0, position.price)
+        self.assertEqual(-25 + 10 * 2 * 2, position.realized_pnl)
+        self.assertEqual(0, position.unrealized_pnl)
+
+
+class TestPositionEngine(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.main_engine = DummyMainEngine()
+        self.event_engine = EventEngine()
+        self.oms_engine = OmsEngine(self.main_engine, self.event_engine)
+        self.engine = PositionEngine(self.main_engine, self.event_engine, publish_interval=0.01)
+
+    def tearDown(self) -> None:
+        self.engine.close()
+        self.event_engine.stop()
+
+    def test_events(self):
+        contract = ContractData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI, name="btcusdt",
+                                product=Product.SPOT, size=10, pricetick=0.01)
+        self.oms_engine.process_contract_event(Event("eContract.", contract))
+
+        published = ThreadEvent()
+
+        def process_position_event(event: Event) -> None:
+            if event.data.pnl == 10:
+                published.set()
+
+        self.event_engine.register(EVENT_POSITION, process_position_event)
+        self.event_engine.start()
+
+        self.event_engine.put(Event(EVENT_TRADE + "btcusdt.HUOBI", make_trade(Direction.LONG, 100, 1, "1")))
+        tick = TickData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI, datetime=None,
+                        last_price=101)
+        self.event_engine.put(Event(EVENT_TICK + "btcusdt.HUOBI", tick))
+
+        self.assertTrue(published.wait(2))
+        position = self.main_engine.get_net_position("btcusdt.HUOBI")
+        self.assertEqual(10, position.size)
+        self.assertEqual(10, position.unrealized_pnl)
+        self.assertEqual(10, self.oms_engine.get_position("btcusdt.HUOBI.净").pnl)
+
+    def test_contract_after_trades(self):
+        self.engine.process_trade_event(Event(EVENT_TRADE, make_trade(Direction.LONG, 100, 2, "1")))
+        self.engine.process_trade_event(Event(EVENT_TRADE, make_trade(Direction.SHORT, 105, 1, "2")))
+        position = self.engine.get_net_position("btcusdt.HUOBI")
+        self.assertEqual(1, position.size)
+        self.assertEqual(5, position.realized_pnl)
+
+        contract = ContractData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI, name="btcusdt",
+                                product=Product.SPOT, size=10, pricetick=0.01)
+        self.engine.process_contracts_event(Event(EVENT_CONTRACTS, [contract]))
+        self.assertEqual(10, position.size)
+        self.assertEqual(50, position.realized_pnl)
+        self.assertIn("btcusdt.HUOBI", self.engine.changed)
+
+    def test_restored_position(self):
+        # the OMS restored a long 2 @ 100 from its checkpoint
+        restored = PositionData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI,
+                                direction=Direction.NET, volume=2, price=100)
+        self.oms_engine.process_position_event(Event(EVENT_POSITION, restored))
+
+        self.engine.process_trade_event(Event(EVENT_TRADE, make_trade(Direction.LONG, 110, 2, "1")))
+        position = self.engine.get_net_position("btcusdt.HUOBI")
+        self.assertEqual(4, position.volume)
+        self.assertEqual(105, position.price)
+
+        self.engine.process_trade_event(Event(EVENT_TRADE, make_trade(Direction.SHORT, 115, 1, "2")))
+        self.assertEqual(3, position.volume)
+        self.assertEqual(10, position.realized_pnl)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
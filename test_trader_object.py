@@ -0,0 +1,70 @@
+import pickle
+import unittest
+from copy import copy
+from datetime import datetime
+
+from trader_object import *
+
+
+class TestSlottedData(unittest.TestCase):
+
+    def test_no_dict(self):
+        tick = TickData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI, datetime=datetime.now())
+        order = OrderData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI, orderid="1")
+        trade = TradeData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI, orderid="1", tradeid="2")
+        bar = BarData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI, datetime=datetime.now())
+
+        for data in (tick, order, trade, bar):
+            self.assertFalse(hasattr(data, "__dict__"))
+            self.assertEqual("btcusdt.HUOBI", data.vt_symbol)
+            with self.assertRaises(AttributeError):
+                data.unknown = 1
+
+        self.assertEqual("HUOBI.1", order.vt_orderid)
+        self.assertEqual("HUOBI.2", trade.vt_tradeid)
+
+    def test_copy_and_pickle(self):
+        tick = TickData(gateway_name="HUOBI", symbol="btcusdt", exchange=Exchange.HUOBI,
+                        datetime=datetime.now(), bid_price_1=1.5)
+
+        copied = copy(tick)
+        self.assertIsNot(tick, copied)
+        self.assertEqual(tick, copied)
+        self.assertEqual(tick.vt_symbol, copied.vt_symbol)
+
+        copied.bid_price_1 = 2
+        self.assertEqual(1.5, tick.bid_price_1)
+
+        loaded = pickle.loads(pickle.dumps(tick))
+        self.assertEqual(tick, loaded)
+        self.assertEqual(tick.vt_symbol, loaded.vt_symbol)
+
+
+class TestSymbolRegistry(unittest.TestCase):
+
+    def test_shared_vt_symbol(self):
+        tick = TickData(gateway_name="HUOBI", symbol="ethusdt", exchange=Exchange.HUOBI, datetime=datetime.now())
+        order = OrderData(gateway_name="HUOBI", symbol="eth" + "usdt", exchange=Exchange.HUOBI, orderid="1")
+        req = SubscribeRequest(symbol="ethusdt", exchange=Exchange.HUOBI)
+
+        self.assertEqual("ethusdt.HUOBI", tick.vt_symbol)
+        self.assertIs(tick.vt_symbol, order.vt_symbol)
+        self.assertIs(tick.vt_symbol, req.vt_symbol)
+
+    def test_symbol_id(self):
+        registry = SymbolRegistry()
+        self.assertEqual(-1, registry.get_symbol_id("btcusdt.OKEX"))
+
+        btc = registry.get_vt_symbol("btcusdt", Exchange.OKEX)
+        eth = registry.get_vt_symbol("ethusdt", Exchange.OKEX)
+        self.assertIs(btc, registry.get_vt_symbol("btcusdt", Exchange.OKEX))
+        self.assertEqual(0, registry.get_symbol_id(btc))
+        self.assertEqual(1, registry.get_symbol_id(eth))
+        self.assertEqual(eth, registry.get_vt_symbol_by_id(1))
+        self.assertEqual(2, len(registry))
+        with self.assertRaises(IndexError):
+            registry.get_vt_symbol_by_id(-1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,56 @@
+import unittest
+from datetime import datetime
+
+from trader_constant import Exchange
+from trader_orderbook import OrderBook
+
+
+class TestOrderBook(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.book = OrderBook("btcusdt", Exchange.HUOBI, "HUOBI", depth=8)
+        self.book.apply_snapshot(
+            [(100 - n, n + 1) for n in range(10)],
+            [(101 + n, n + 1) for n in reversed(range(10))],
+        )
+
+    def test_snapshot(self):
+        self.assertEqual(8, len(self.book.bids))
+        self.assertEqual(8, len(self.book.asks))
+        self.assertEqual([(100, 1), (99, 2)], self.book.bids.levels(2))
+        self.assertEqual([(101, 1), (102, 2)], self.book.asks.levels(2))
+        self.assertEqual(93, self.book.bids.price(7))
+        self.assertEqual(1, self.book.spread())
+        self.assertEqual(100.5, self.book.mid_price())
+
+    def test_diff(self):
+        self.book.apply_diff(
+            [(100.5, 3), (99, 0), (95, 7), (80, 1)],
+            [(101, 0), (150, 1)],
+        )
+
+        self.assertEqual([(100.5, 3), (100, 1), (98, 3), (97, 4)], self.book.bids.levels(4))
+        self.assertEqual(7, self.book.bids.volume(5))
+        # 93 was pushed out by 100.5, so nothing is known below 94
+        self.assertEqual(7, len(self.book.bids))
+        self.assertNotIn(-80, self.book.bids.keys)
+
+        self.assertEqual(102, self.book.asks.price())
+        self.assertEqual(7, len(self.book.asks))
+        self.assertNotIn(150, self.book.asks.keys)
+
+    def test_tick(self):
+        dt = datetime(2019, 10, 10)
+        self.book.apply_diff([], [(103, 0), (104, 0), (105, 0), (106, 0), (107, 0), (108, 0)], dt)
+
+        tick = self.book.to_tick()
+        self.assertEqual("btcusdt.HUOBI", tick.vt_symbol)
+        self.assertEqual(dt, tick.datetime)
+        self.assertEqual((100, 1), (tick.bid_price_1, tick.bid_volume_1))
+        self.assertEqual((96, 5), (tick.bid_price_5, tick.bid_volume_5))
+        self.assertEqual((102, 2), (tick.ask_price_2, tick.ask_volume_2))
+        self.assertEqual((0, 0), (tick.ask_price_3, tick.ask_volume_3))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
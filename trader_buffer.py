@@ -0,0 +1,354 @@
+from datetime import tzinfo
+from typing import Any, Dict, List, Sequence, Tuple, Type
+
+import numpy as np
+
+from trader_constant import Exchange, Interval
+from trader_object import BarData, BaseData, TickData, symbol_registry
+
+BAR_FIELDS = (
+    "volume",
+    "open_interest",
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+)
+
+TICK_FIELDS = (
+    "volume",
+    "open_interest",
+    "last_price",
+    "last_volume",
+    "limit_up",
+    "limit_down",
+    "open_price",
+    "high_price",
+    "low_price",
+    "pre_close",
+) + tuple(
+    f"{side}_{kind}_{n}" for side in ("bid", "ask") for kind in ("price", "volume") for n in range(1, 6)
+)
+
+INTERVAL_SECONDS = {
+    Interval.MINUTE: 60,
+    Interval.HOUR: 3600,
+    Interval.DAILY: 86400,
+}
+
+
+class ColumnBuffer:
+    # ```
+    # Struct of arrays for one kind of market data: a datetime64 column, an
+    # int32 symbol id column (see SymbolRegistry) and a float64 column per
+    # numeric field. Datetimes are stored as naive wall clock time of
+    # tzinfo, which is taken from the first appended datetime if not given.
+    # Columns are read as attributes, e.g. buffer.close_price, and are views
+    # of the filled part only.
+    # ```
+    data_class: Type[BaseData] = None
+    fields: Tuple[str, ...] = ()
+
+    def __init__(self, capacity: int = 1024, gateway_name: str = "", tz: tzinfo = None):
+        self.gateway_name: str = gateway_name
+        self.tzinfo: tzinfo = tz
+        self._size: int = 0
+        self._columns: Dict[str, np.ndarray] = self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity: int) -> Dict[str, np.ndarray]:
+        columns = {
+            "datetime": np.zeros(capacity, "datetime64[us]"),
+            "symbol_id": np.zeros(capacity, np.int32),
+        }
+        for name in self.fields:
+            columns[name] = np.zeros(capacity, np.float64)
+        return columns
+
+    def _reserve(self, count: int) -> None:
+        capacity = len(self._columns["datetime"])
+        if self._size + count <= capacity:
+            return
+
+        columns = self._allocate(max(capacity * 2, self._size + count))
+        for name, column in self._columns.items():
+            columns[name][:self._size] = column[:self._size]
+        self._columns = columns
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        columns = self.__dict__.get("_columns", None)
+        if columns is not None and name in columns:
+            return columns[name][:self._size]
+        raise AttributeError(name)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: Any) -> Any:
+        # an int gives back a data object, a slice or an index array a new buffer
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += self._size
+            if not 0 <= index < self._size:
+                raise IndexError("buffer index out of range")
+            return self._to_objects(index, index + 1)[0]
+
+        columns = {name: column[:self._size][index] for name, column in self._columns.items()}
+        return self.from_columns(columns, **self._options())
+
+    def _options(self) -> dict:
+        return {"gateway_name": self.gateway_name, "tz": self.tzinfo}
+
+    def _convert_datetime(self, dt: Any) -> Any:
+        if dt is None or dt.tzinfo is None:
+            return dt
+        if self.tzinfo is None:
+            self.tzinfo = dt.tzinfo
+        return dt.astimezone(self.tzinfo).replace(tzinfo=None)
+
+    def append(self, data: BaseData) -> None:
+        self._reserve(1)
+        columns = self._columns
+        i = self._size
+
+        columns["datetime"][i] = self._convert_datetime(data.datetime)
+        columns["symbol_id"][i] = register_symbol(data.symbol, data.exchange)
+        for name in self.fields:
+            columns[name][i] = getattr(data, name)
+
+        if not self.gateway_name:
+            self.gateway_name = data.gateway_name
+        self._size += 1
+
+    def extend(self, datas: Sequence[BaseData]) -> None:
+        if not datas:
+            return
+        count = len(datas)
+        self._reserve(count)
+        columns = self._columns
+        start, end = self._size, self._size + count
+
+        columns["datetime"][start:end] = [self._convert_datetime(data.datetime) for data in datas]
+        columns["symbol_id"][start:end] = [register_symbol(data.symbol, data.exchange) for data in datas]
+        for name in self.fields:
+            columns[name][start:end] = [getattr(data, name) for data in datas]
+
+        if not self.gateway_name:
+            self.gateway_name = datas[0].gateway_name
+        self._size = end
+
+    @classmethod
+    def from_list(cls, datas: Sequence[BaseData], **kwargs: Any) -> "ColumnBuffer":
+        buffer = cls(len(datas), **kwargs)
+        buffer.extend(datas)
+        return buffer
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Sequence], vt_symbol: str = "", **kwargs: Any) -> "ColumnBuffer":
+        # ```
+        # Build a buffer around ready made columns, e.g. rows loaded from the
+        # database. Missing fields are zero, a missing symbol_id column is
+        # filled with the id of vt_symbol.
+        # ```
+        size = len(columns["datetime"]) if "datetime" in columns else 0
+        buffer = cls(size, **kwargs)
+        target = buffer._columns
+
+        for name, values in columns.items():
+            if name in target:
+                target[name][:size] = np.asarray(values, dtype=target[name].dtype)
+        if "symbol_id" not in columns and vt_symbol:
+            target["symbol_id"][:size] = register_symbol(*split_vt_symbol(vt_symbol))
+
+        buffer._size = size
+        return buffer
+
+    def to_list(self) -> List[BaseData]:
+        return self._to_objects(0, self._size)
+
+    def _to_objects(self, start: int, end: int) -> List[BaseData]:
+        columns = self._columns
+        datetimes = columns["datetime"][start:end].tolist()
+        symbol_ids = columns["symbol_id"][start:end].tolist()
+        values = [columns[name][start:end].tolist() for name in self.fields]
+        extra = self._extra()
+
+        symbols = {}
+        datas = []
+        for i, symbol_id in enumerate(symbol_ids):
+            symbol = symbols.get(symbol_id, None)
+            if not symbol:
+                symbol = symbols[symbol_id] = split_vt_symbol(symbol_registry.get_vt_symbol_by_id(symbol_id))
+
+            dt = datetimes[i]
+            if self.tzinfo is not None:
+                dt = dt.replace(tzinfo=self.tzinfo)
+
+            data = self.data_class(
+                gateway_name=self.gateway_name,
+                symbol=symbol[0],
+                exchange=symbol[1],
+                datetime=dt,
+                **extra
+            )
+            for name, column in zip(self.fields, values):
+                setattr(data, name, column[i])
+            datas.append(data)
+        return datas
+
+    def _extra(self) -> dict:
+        return {}
+
+    def _symbol_order(self) -> np.ndarray:
+        # row indexes grouped by symbol, keeping the row order within each symbol
+        return np.argsort(self.symbol_id, kind="stable")
+
+    def _groups(
+            self,
+            interval: Interval,
+            window: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        # ```
+        # Split the rows, grouped by symbol, into runs of the same symbol and
+        # time bucket. Rows of one symbol must be sorted by time, as they are
+        # loaded, but symbols may be interleaved. Return bucket start times,
+        # the row order and the start and end index of each run in it.
+        # ```
+        if interval not in INTERVAL_SECONDS:
+            raise ValueError(f"can not resample to {interval}")
+        step = INTERVAL_SECONDS[interval] * window * 1_000_000
+
+        order = self._symbol_order()
+        bucket = self.datetime.astype(np.int64)[order] // step
+        symbol_id = self.symbol_id[order]
+        change = (bucket[1:] != bucket[:-1]) | (symbol_id[1:] != symbol_id[:-1])
+        starts = np.concatenate(([0], np.flatnonzero(change) + 1))
+        ends = np.append(starts[1:], self._size)
+        return (bucket[starts] * step).astype("datetime64[us]"), order, starts, ends
+
+    def _resampled(self, interval: Interval, columns: Dict[str, np.ndarray]) -> "BarBuffer":
+        return BarBuffer.from_columns(columns, gateway_name=self.gateway_name, tz=self.tzinfo, interval=interval)
+
+
+class BarBuffer(ColumnBuffer):
+    data_class = BarData
+    fields = BAR_FIELDS
+
+    def __init__(self, capacity: int = 1024, gateway_name: str = "", tz: tzinfo = None, interval: Interval = None):
+        super().__init__(capacity, gateway_name, tz)
+        self.interval: Interval = interval
+
+    def _options(self) -> dict:
+        options = super()._options()
+        options["interval"] = self.interval
+        return options
+
+    def _extra(self) -> dict:
+        return {"interval": self.interval}
+
+    def append(self, data: BarData) -> None:
+        if self.interval is None:
+            self.interval = data.interval
+        super().append(data)
+
+    def extend(self, datas: Sequence[BarData]) -> None:
+        if self.interval is None and datas:
+            self.interval = datas[0].interval
+        super().extend(datas)
+
+    def vwap(self) -> float:
+        # volume weighted average of the typical price (high + low + close) / 3
+        volume = self.volume
+        total = volume.sum()
+        if not total:
+            return float("nan")
+        typical = (self.high_price + self.low_price + self.close_price) / 3
+        return float((typical * volume).sum() / total)
+
+    def resample(self, interval: Interval, window: int = 1) -> "BarBuffer":
+        # bars of each symbol in turn, in time order
+        if not self._size:
+            return BarBuffer(gateway_name=self.gateway_name, tz=self.tzinfo, interval=interval)
+
+        dt, order, starts, ends = self._groups(interval, window)
+        return self._resampled(interval, {
+            "datetime": dt,
+            "symbol_id": self.symbol_id[order][starts],
+            "open_price": self.open_price[order][starts],
+            "high_price": np.maximum.reduceat(self.high_price[order], starts),
+            "low_price": np.minimum.reduceat(self.low_price[order], starts),
+            "close_price": self.close_price[order][ends - 1],
+            "volume": np.add.reduceat(self.volume[order], starts),
+            "open_interest": self.open_interest[order][ends - 1],
+        })
+
+
+class TickBuffer(ColumnBuffer):
+    data_class = TickData
+    fields = TICK_FIELDS
+
+    def spread(self) -> np.ndarray:
+        return self.ask_price_1 - self.bid_price_1
+
+    def mid_price(self) -> np.ndarray:
+        return (self.ask_price_1 + self.bid_price_1) / 2
+
+    def volume_delta(self) -> np.ndarray:
+        # ```
+        # Traded volume between ticks from the cumulative volume column, in
+        # row order. Each tick is compared with the previous tick of its own
+        # symbol. A drop (daily reset) counts the new cumulative volume, the
+        # first tick of each symbol counts nothing.
+        # ```
+        if not self._size:
+            return self.volume.copy()
+
+        order = self._symbol_order()
+        volume = self.volume[order]
+        delta = np.diff(volume, prepend=volume[:1])
+        reset = delta < 0
+        delta[reset] = volume[reset]
+
+        symbol_id = self.symbol_id[order]
+        delta[1:][symbol_id[1:] != symbol_id[:-1]] = 0
+
+        result = np.empty_like(delta)
+        result[order] = delta
+        return result
+
+    def vwap(self) -> float:
+        delta = self.volume_delta()
+        total = delta.sum()
+        if not total:
+            return float("nan")
+        return float((self.last_price * delta).sum() / total)
+
+    def resample(self, interval: Interval, window: int = 1) -> BarBuffer:
+        # ```
+        # OHLC bars of last_price, volume from the cumulative volume deltas,
+        # bars of each symbol in turn
+        # ```
+        if not self._size:
+            return BarBuffer(gateway_name=self.gateway_name, tz=self.tzinfo, interval=interval)
+
+        dt, order, starts, ends = self._groups(interval, window)
+        price = self.last_price[order]
+        return self._resampled(interval, {
+            "datetime": dt,
+            "symbol_id": self.symbol_id[order][starts],
+            "open_price": price[starts],
+            "high_price": np.maximum.reduceat(price, starts),
+            "low_price": np.minimum.reduceat(price, starts),
+            "close_price": price[ends - 1],
+            "volume": np.add.reduceat(self.volume_delta()[order], starts),
+            "open_interest": self.open_interest[order][ends - 1],
+        })
+
+
+def register_symbol(symbol: str, exchange: Exchange) -> int:
+    # id of the symbol, registered here if data was unpickled from a process that had it
+    return symbol_registry.get_symbol_id(symbol_registry.get_vt_symbol(symbol, exchange))
+
+
+def split_vt_symbol(vt_symbol: str) -> Tuple[str, Exchange]:
+    symbol, exchange = vt_symbol.rsplit(".", 1)
+    return symbol, Exchange(exchange)
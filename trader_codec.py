@@ -0,0 +1,282 @@
+import pickle
+import struct
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Sequence, Tuple, Type, Union
+
+from trader_constant import Direction, Exchange, Interval, Offset, OptionType, OrderType, Product, Status
+from trader_object import (
+    AccountData, BarData, BaseData, ContractData, OrderData, PositionData, TickData, TradeData
+)
+
+CODEC_VERSION = 1
+
+# record: codec version, type tag, length of the body
+HEADER = struct.Struct("<BBI")
+STRING = struct.Struct("<H")
+
+# a batch is a header with tag 0 and the number of records as length
+BATCH_TAG = 0
+
+NO_ENUM = 255
+NO_DATETIME = -(1 << 63)
+NAIVE_OFFSET = -(1 << 15)
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+MINUTE = timedelta(minutes=1)
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+def pack_datetime(dt: datetime) -> Tuple[int, int]:
+    # microseconds since epoch (UTC if aware) and UTC offset in minutes
+    if dt is None:
+        return NO_DATETIME, 0
+
+    offset = dt.utcoffset()
+    if offset is None:
+        return (dt - EPOCH) // MICROSECOND, NAIVE_OFFSET
+    return (dt.replace(tzinfo=None) - offset - EPOCH) // MICROSECOND, offset // MINUTE
+
+
+def unpack_datetime(microseconds: int, offset: int) -> datetime:
+    if microseconds == NO_DATETIME:
+        return None
+    if offset == NAIVE_OFFSET:
+        return EPOCH + timedelta(microseconds=microseconds)
+
+    dt = EPOCH_UTC + timedelta(microseconds=microseconds)
+    return dt.astimezone(timezone(timedelta(minutes=offset)))
+
+
+class RecordLayout:
+    # ```
+    # Fixed binary layout of one trader_object class: one struct with the
+    # floats, enum member indexes, datetimes and bools, followed by the
+    # strings, each prefixed with its length. Any change of a layout or of
+    # the member order of an enum it uses needs a new CODEC_VERSION.
+    # ```
+    def __init__(
+            self,
+            tag: int,
+            data_class: Type[BaseData],
+            strings: Sequence[str],
+            enums: Dict[str, Type[Enum]],
+            datetimes: Sequence[str],
+            floats: Sequence[str],
+            bools: Sequence[str] = ()
+    ):
+        self.tag: int = tag
+        self.data_class: Type[BaseData] = data_class
+        self.strings: Tuple[str, ...] = tuple(strings)
+        self.enums: Tuple[str, ...] = tuple(enums)
+        self.datetimes: Tuple[str, ...] = tuple(datetimes)
+        self.floats: Tuple[str, ...] = tuple(floats)
+        self.bools: Tuple[str, ...] = tuple(bools)
+
+        self.members: List[tuple] = [tuple(enum_class) for enum_class in enums.values()]
+        self.indexes: List[dict] = [{member: i for i, member in enumerate(members)} for members in self.members]
+        self.fixed: struct.Struct = struct.Struct(
+            "<" + "d" * len(self.floats) + "B" * len(self.enums)
+            + "qh" * len(self.datetimes) + "?" * len(self.bools)
+        )
+
+    def encode(self, data: BaseData) -> bytes:
+        values = [getattr(data, name) for name in self.floats]
+        for name, indexes in zip(self.enums, self.indexes):
+            member = getattr(data, name)
+            values.append(NO_ENUM if member is None else indexes[member])
+        for name in self.datetimes:
+            values.extend(pack_datetime(getattr(data, name)))
+        for name in self.bools:
+            values.append(bool(getattr(data, name)))
+
+        parts = [b"", self.fixed.pack(*values)]
+        for name in self.strings:
+            raw = (getattr(data, name) or "").encode("utf8")
+            parts.append(STRING.pack(len(raw)))
+            parts.append(raw)
+
+        parts[0] = HEADER.pack(CODEC_VERSION, self.tag, sum(map(len, parts)))
+        return b"".join(parts)
+
+    def decode_body(self, view: memoryview, offset: int) -> BaseData:
+        values = self.fixed.unpack_from(view, offset)
+        kwargs = dict(zip(self.floats, values))
+
+        i = len(self.floats)
+        for name, members in zip(self.enums, self.members):
+            code = values[i]
+            kwargs[name] = None if code == NO_ENUM else members[code]
+            i += 1
+        for name in self.datetimes:
+            kwargs[name] = unpack_datetime(values[i], values[i + 1])
+            i += 2
+        for name in self.bools:
+            kwargs[name] = values[i]
+            i += 1
+
+        offset += self.fixed.size
+        for name in self.strings:
+            length = STRING.unpack_from(view, offset)[0]
+            offset += STRING.size
+            kwargs[name] = str(view[offset:offset + length], "utf8")
+            offset += length
+
+        return self.data_class(**kwargs)
+
+
+LAYOUTS = (
+    RecordLayout(
+        1, TickData,
+        strings=("gateway_name", "symbol", "name"),
+        enums={"exchange": Exchange},
+        datetimes=("datetime",),
+        floats=(
+            "volume", "open_interest", "last_price", "last_volume", "limit_up", "limit_down",
+            "open_price", "high_price", "low_price", "pre_close",
+            "bid_price_1", "bid_price_2", "bid_price_3", "bid_price_4", "bid_price_5",
+            "ask_price_1", "ask_price_2", "ask_price_3", "ask_price_4", "ask_price_5",
+            "bid_volume_1", "bid_volume_2", "bid_volume_3", "bid_volume_4", "bid_volume_5",
+            "ask_volume_1", "ask_volume_2", "ask_volume_3", "ask_volume_4", "ask_volume_5",
+        )
+    ),
+    RecordLayout(
+        2, BarData,
+        strings=("gateway_name", "symbol"),
+        enums={"exchange": Exchange, "interval": Interval},
+        datetimes=("datetime",),
+        floats=("volume", "open_interest", "open_price", "high_price", "low_price", "close_price")
+    ),
+    RecordLayout(
+        3, OrderData,
+        strings=("gateway_name", "symbol", "orderid", "reference"),
+        enums={
+            "exchange": Exchange,
+            "type": OrderType,
+            "direction": Direction,
+            "offset": Offset,
+            "status": Status
+        },
+        datetimes=("datetime",),
+        floats=("price", "volume", "traded")
+    ),
+    RecordLayout(
+        4, TradeData,
+        strings=("gateway_name", "symbol", "orderid", "tradeid"),
+        enums={"exchange": Exchange, "direction": Direction, "offset": Offset},
+        datetimes=("datetime",),
+        floats=("price", "volume")
+    ),
+    RecordLayout(
+        5, PositionData,
+        strings=("gateway_name", "symbol"),
+        enums={"exchange": Exchange, "direction": Direction},
+        datetimes=(),
+        floats=("volume", "frozen", "price", "pnl", "yd_volume")
+    ),
+    RecordLayout(
+        6, AccountData,
+        strings=("gateway_name", "accountid"),
+        enums={},
+        datetimes=(),
+        floats=("balance", "frozen")
+    ),
+    RecordLayout(
+        7, ContractData,
+        strings=("gateway_name", "symbol", "name", "option_underlying", "option_portfolio", "option_index"),
+        enums={"exchange": Exchange, "product": Product, "option_type": OptionType},
+        datetimes=("option_expiry",),
+        floats=("size", "pricetick", "min_volume", "option_strike"),
+        bools=("stop_supported", "net_position", "history_data")
+    ),
+)
+
+LAYOUT_BY_CLASS: Dict[type, RecordLayout] = {layout.data_class: layout for layout in LAYOUTS}
+LAYOUT_BY_TAG: Dict[int, RecordLayout] = {layout.tag: layout for layout in LAYOUTS}
+
+
+def is_encodable(data: Any) -> bool:
+    return type(data) in LAYOUT_BY_CLASS
+
+
+def encode(data: BaseData) -> bytes:
+    layout = LAYOUT_BY_CLASS.get(type(data), None)
+    if not layout:
+        raise TypeError(f"can not encode {type(data).__name__}")
+    return layout.encode(data)
+
+
+def encode_batch(datas: Sequence[BaseData]) -> bytes:
+    # many records, possibly of different classes, in one buffer
+    return join_batch([encode(data) for data in datas])
+
+
+def join_batch(records: Sequence[bytes]) -> bytes:
+    # batch of records already encoded one by one
+    return HEADER.pack(CODEC_VERSION, BATCH_TAG, len(records)) + b"".join(records)
+
+
+def _read_header(view: memoryview, offset: int) -> Tuple[int, int]:
+    version, tag, length = HEADER.unpack_from(view, offset)
+    if version != CODEC_VERSION:
+        raise ValueError(f"unsupported codec version {version}")
+    return tag, length
+
+
+def _decode_record(view: memoryview, offset: int) -> Tuple[BaseData, int]:
+    tag, length = _read_header(view, offset)
+    layout = LAYOUT_BY_TAG.get(tag, None)
+    if not layout:
+        raise ValueError(f"unknown record tag {tag}")
+
+    offset += HEADER.size
+    if offset + length > len(view):
+        raise ValueError(f"record of {length} bytes at {offset} is truncated")
+    return layout.decode_body(view, offset), offset + length
+
+
+def iter_batch(buffer: BytesLike) -> Iterator[BaseData]:
+    # decode lazily straight from the buffer, no record is copied out of it
+    view = memoryview(buffer)
+    tag, count = _read_header(view, 0)
+    if tag != BATCH_TAG:
+        raise ValueError("buffer is not a batch")
+
+    offset = HEADER.size
+    for _ in range(count):
+        data, offset = _decode_record(view, offset)
+        yield data
+
+
+def decode_batch(buffer: BytesLike) -> List[BaseData]:
+    return list(iter_batch(buffer))
+
+
+def decode(buffer: BytesLike) -> Union[BaseData, List[BaseData]]:
+    # a single record, or a list for a batch
+    view = memoryview(buffer)
+    if _read_header(view, 0)[0] == BATCH_TAG:
+        return decode_batch(view)
+    return _decode_record(view, 0)[0]
+
+
+def encode_data(data: Any) -> bytes:
+    # ```
+    # Encode any event data: trader objects (or lists of them) with the
+    # codec, anything else with pickle. A pickle always starts with its
+    # PROTO opcode 0x80, which is never a codec version.
+    # ```
+    if type(data) in LAYOUT_BY_CLASS:
+        return LAYOUT_BY_CLASS[type(data)].encode(data)
+    if isinstance(data, list) and data and all(type(d) in LAYOUT_BY_CLASS for d in data):
+        return encode_batch(data)
+    return pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+
+
+def decode_data(payload: BytesLike) -> Any:
+    if payload[0] == CODEC_VERSION:
+        return decode(payload)
+    return pickle.loads(payload)
@@ -0,0 +1,89 @@
+import hashlib
+import os
+import struct
+from time import time
+from typing import Dict, List, Optional, Sequence
+
+from trader_codec import encode_batch, iter_batch
+from trader_object import ContractData
+from trader_utitlity import get_file_path
+
+# contracts older than this are revalidated against the exchange on connect
+CONTRACT_TTL = 24 * 3600
+
+# file: time saved, digest of the contract batch, then the batch itself
+META = struct.Struct("<d16s")
+
+
+def digest_contracts(payload: bytes) -> bytes:
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+class ContractCache:
+    # ```
+    # Contracts of one gateway kept in .temp between sessions, so connect
+    # can publish them before the exchange answers. The digest of the
+    # encoded symbol list works as an etag: update() takes the full list
+    # downloaded from the exchange and returns only the contracts that are
+    # new or changed since the cached one, nothing when the digest matches.
+    # A cache younger than ttl is fresh and needs no download at all.
+    # ```
+    def __init__(self, name: str, ttl: float = CONTRACT_TTL):
+        self.path: str = str(get_file_path(f"contracts_{name}.bin"))
+        self.ttl: float = ttl
+
+        self.contracts: Dict[str, ContractData] = {}
+        self.saved: float = 0
+        self.digest: bytes = b""
+
+    def load(self) -> List[ContractData]:
+        if not os.path.exists(self.path):
+            return []
+
+        try:
+            with open(self.path, "rb") as f:
+                payload = f.read()
+            saved, digest = META.unpack_from(payload, 0)
+            contracts = list(iter_batch(memoryview(payload)[META.size:]))
+        except (OSError, ValueError, struct.error):
+            # unreadable or written by another codec version, download again
+            return []
+
+        self.contracts = {contract.vt_symbol: contract for contract in contracts}
+        self.saved = saved
+        self.digest = digest
+        return contracts
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        if not self.contracts:
+            return False
+        return (now or time()) - self.saved < self.ttl
+
+    def update(self, contracts: Sequence[ContractData]) -> List[ContractData]:
+        payload = encode_batch(sorted(contracts, key=lambda contract: contract.vt_symbol))
+        digest = digest_contracts(payload)
+        if digest == self.digest:
+            changed = []
+        else:
+            changed = [c for c in contracts if self.contracts.get(c.vt_symbol, None) != c]
+            self.contracts = {contract.vt_symbol: contract for contract in contracts}
+            self.digest = digest
+
+        # saved again even if unchanged, it was revalidated just now
+        self.saved = time()
+        self.save(payload)
+        return changed
+
+    def save(self, payload: bytes) -> None:
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(META.pack(self.saved, self.digest))
+            f.write(payload)
+        os.replace(temp_path, self.path)
+
+    def clear(self) -> None:
+        self.contracts.clear()
+        self.saved = 0
+        self.digest = b""
+        if os.path.exists(self.path):
+            os.remove(self.path)
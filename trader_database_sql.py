@@ -4,9 +4,10 @@ from typing import List, Type, Sequence, Optional, Dict
 from peewee import Database, AutoField, CharField, DateTimeField, FloatField, chunked, Model, fn, SqliteDatabase, \
     PostgresqlDatabase
 
+from trader_buffer import BAR_FIELDS, TICK_FIELDS, BarBuffer, TickBuffer
 from trader_constant import Exchange, Interval
 from trader_database_base import Driver, DB_TZ, BaseDatabaseManager
-from trader_object import BarData, TickData
+from trader_object import BarData, TickData, get_vt_symbol
 from trader_utitlity import get_file_path
 
 
@@ -338,18 +339,48 @@ class SqlManager(BaseDatabaseManager):
                       ) -> Sequence[BarData]:
         s = (
             self.class_bar.select()
-                .where(
-                (self.class_bar.symbol == symbol)
-                & (self.class_bar.exchange == exchange.value)
-                & (self.class_bar.interval == interval.value)
-                & (self.class_bar.datetime >= start)
-                & (self.class_bar.datetime <= end)
-            )
+                .where(self._bar_condition(symbol, exchange, interval, start, end))
                 .order_by(self.class_bar.datetime)
         )
         data = [db_bar.to_bar() for db_bar in s]
         return data
 
+    def load_bar_buffer(self,
+                        symbol: str,
+                        exchange: Exchange,
+                        interval: Interval,
+                        start: datetime,
+                        end: datetime
+                        ) -> BarBuffer:
+        """
+        Same as load_bar_data, but read the rows as plain tuples straight
+        into a BarBuffer without building a model and a BarData per row
+        """
+        names = ("datetime",) + BAR_FIELDS
+        s = (
+            self.class_bar.select(*[getattr(self.class_bar, name) for name in names])
+                .where(self._bar_condition(symbol, exchange, interval, start, end))
+                .order_by(self.class_bar.datetime)
+                .tuples()
+        )
+        columns = dict(zip(names, zip(*s)))
+        return BarBuffer.from_columns(
+            columns,
+            get_vt_symbol(symbol, exchange),
+            gateway_name="DB",
+            tz=DB_TZ,
+            interval=interval
+        )
+
+    def _bar_condition(self, symbol: str, exchange: Exchange, interval: Interval, start: datetime, end: datetime):
+        return (
+            (self.class_bar.symbol == symbol)
+            & (self.class_bar.exchange == exchange.value)
+            & (self.class_bar.interval == interval.value)
+            & (self.class_bar.datetime >= start)
+            & (self.class_bar.datetime <= end)
+        )
+
     def load_tick_data(self,
                        symbol: str,
                        exchange: Exchange,
@@ -358,18 +389,46 @@ class SqlManager(BaseDatabaseManager):
                        ) -> Sequence[TickData]:
         s = (
             self.class_tick.select()
-                .where(
-                (self.class_tick.symbol == symbol)
-                & (self.class_tick.exchange == exchange.value)
-                & (self.class_tick.datetime >= start)
-                & (self.class_tick.datetime <= end)
-            )
+                .where(self._tick_condition(symbol, exchange, start, end))
                 .order_by(self.class_tick.datetime)
         )
         print(s)
         data = [db_tick.to_tick() for db_tick in s]
         return data
 
+    def load_tick_buffer(self,
+                         symbol: str,
+                         exchange: Exchange,
+                         start: datetime,
+                         end: datetime
+                         ) -> TickBuffer:
+        """
+        Same as load_tick_data, but read the rows as plain tuples straight
+        into a TickBuffer. Depth columns not stored for a tick are NaN.
+        """
+        names = ("datetime",) + TICK_FIELDS
+        s = (
+            self.class_tick.select(*[getattr(self.class_tick, name) for name in names])
+                .where(self._tick_condition(symbol, exchange, start, end))
+                .order_by(self.class_tick.datetime)
+                .tuples()
+        )
+        columns = dict(zip(names, zip(*s)))
+        return TickBuffer.from_columns(
+            columns,
+            get_vt_symbol(symbol, exchange),
+            gateway_name="DB",
+            tz=DB_TZ
+        )
+
+    def _tick_condition(self, symbol: str, exchange: Exchange, start: datetime, end: datetime):
+        return (
+            (self.class_tick.symbol == symbol)
+            & (self.class_tick.exchange == exchange.value)
+            & (self.class_tick.datetime >= start)
+            & (self.class_tick.datetime <= end)
+        )
+
     def save_bar_data(self,
                       datas: Sequence["BarData"]
                       ) -> None:
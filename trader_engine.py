@@ -5,9 +5,12 @@ from typing import Any, Sequence, Type, Dict, List, Optional
 from event_engine import Event, EventEngine
 from trader_app import BaseApp
 from trader_engine_email import EmailEngine
+from trader_engine_latency import LatencyEngine
 from trader_engine_omsengine import OmsEngine
+from trader_engine_position import PositionEngine
 from trader_event import (
-    EVENT_LOG
+    EVENT_LOG,
+    EVENT_PRIORITIES
 )
 from trader_gateway import BaseGateway
 from trader_logging_engine import LogEngine
@@ -32,9 +35,11 @@ class MainEngine:
         else:
             self.event_engine = EventEngine()
 
+        for type, priority in EVENT_PRIORITIES.items():
+            self.event_engine.set_priority(type, priority)
         self.event_engine.start()
 
-        self.gateway: Dict[str, BaseGateway] = {}
+        self.gateways: Dict[str, BaseGateway] = {}
         self.engines: Dict[str, BaseEngine] = {}
         self.apps: Dict[str, BaseApp] = {}
         self.exchanges: List[Exchange] = []
@@ -44,7 +49,7 @@ class MainEngine:
 
     def add_engine(self, engine_class: Any) -> "BaseEngine":
         engine = engine_class(self, self.event_engine)
-        self.engines[self.gateway.gateway_name] = engine
+        self.engines[engine.engine_name] = engine
         return engine
 
     def add_gateway(self, gateway_class: Type[BaseGateway]) -> BaseGateway:
@@ -68,6 +73,8 @@ class MainEngine:
         self.add_engine(LogEngine)
         self.add_engine(OmsEngine)
         self.add_engine(EmailEngine)
+        self.add_engine(PositionEngine)
+        self.add_engine(LatencyEngine)
 
     def write_log(self, msg: str, source: str = "") -> None:
         log = LogData(msg=msg, gateway_name=source)
@@ -76,7 +83,7 @@ class MainEngine:
         self.event_engine.put(event)
 
     def get_gateway(self, gateway_name: str) -> BaseGateway:
-        gateway = self.gateway.get(gateway_name, None)
+        gateway = self.gateways.get(gateway_name, None)
         if not gateway:
             self.write_log(f"找不到底层接口：{gateway_name}")
         return gateway
@@ -94,7 +101,7 @@ class MainEngine:
         return None
 
     def get_all_gateway_names(self) -> List[str]:
-        return list(self.gateway.keys())
+        return list(self.gateways.keys())
 
     def get_all_apps(self) -> List[BaseApp]:
         return list(self.apps.values())
@@ -143,8 +150,9 @@ class MainEngine:
         else:
             return None
 
-    def close(self) -> None:
-        self.event_engine.stop()
+    def close(self, drain: bool = False) -> None:
+        # drain: process the events already queued before stopping
+        self.event_engine.stop(drain)
 
         for engine in self.engines.values():
             engine.close()
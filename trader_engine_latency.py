@@ -0,0 +1,151 @@
+from threading import Lock
+from time import perf_counter
+from typing import Any, Dict, List, Sequence, Tuple
+
+from event_engine import Event, EventEngine
+from event_stats import RollingHistogram
+from trader_constant import Status
+from trader_engine_base import BaseEngine
+from trader_event import EVENT_ORDER
+from trader_object import CancelRequest, OrderData, OrderRequest
+
+SEND_TO_ACK = "send_to_ack"
+ACK_TO_FILL = "ack_to_fill"
+CANCEL_TO_CONFIRM = "cancel_to_confirm"
+
+FINISHED_STATUSES = set([Status.ALLTRADED, Status.CANCELLED, Status.REJECTED])
+
+# orders followed at most, the oldest is dropped beyond that
+MAX_PENDING = 10000
+
+
+class OrderTiming:
+    __slots__ = ("gateway_name", "vt_symbol", "sent", "acked", "filled", "cancel")
+
+    def __init__(self, gateway_name: str, vt_symbol: str, sent: float):
+        self.gateway_name: str = gateway_name
+        self.vt_symbol: str = vt_symbol
+        self.sent: float = sent
+        self.acked: float = 0
+        self.filled: float = 0
+        self.cancel: float = 0
+
+
+class LatencyEngine(BaseEngine):
+    # ```
+    # Measures send-to-ack, ack-to-fill and cancel-to-confirm latency of the
+    # orders sent through the main engine, per gateway and vt_symbol, as
+    # rolling histograms of the last window seconds. The ack is the first
+    # order update past SUBMITTING, the fill the first one with traded
+    # volume. Event times are taken when the event was put if event engine
+    # stats are enabled, otherwise when it is processed.
+    # ```
+    def __init__(self, main_engine: Any, event_engine: EventEngine, window: float = 60):
+        super(LatencyEngine, self).__init__(main_engine=main_engine, event_engine=event_engine,
+                                            engine_name="latency")
+
+        self.window: float = window
+        self.timings: Dict[str, OrderTiming] = {}
+        self.histograms: Dict[Tuple[str, str, str], RollingHistogram] = {}
+        self.lock: Lock = Lock()
+
+        self.add_function()
+        self.register_event()
+
+    def add_function(self) -> None:
+        # wrap the order functions of the main engine
+        self._send_order = self.main_engine.send_order
+        self._send_orders = self.main_engine.send_orders
+        self._cancel_order = self.main_engine.cancel_order
+        self._cancel_orders = self.main_engine.cancel_orders
+
+        self.main_engine.send_order = self.send_order
+        self.main_engine.send_orders = self.send_orders
+        self.main_engine.cancel_order = self.cancel_order
+        self.main_engine.cancel_orders = self.cancel_orders
+        self.main_engine.get_order_latency = self.get_order_latency
+
+    def register_event(self) -> None:
+        self.event_engine.register(EVENT_ORDER, self.process_order_event)
+
+    def send_order(self, req: OrderRequest, gateway_name: str) -> str:
+        sent = perf_counter()
+        vt_orderid = self._send_order(req, gateway_name)
+        if vt_orderid:
+            self.add_timing(vt_orderid, OrderTiming(gateway_name, req.vt_symbol, sent))
+        return vt_orderid
+
+    def send_orders(self, reqs: Sequence[OrderRequest], gateway_name: str) -> List[str]:
+        sent = perf_counter()
+        vt_orderids = self._send_orders(reqs, gateway_name)
+        for req, vt_orderid in zip(reqs, vt_orderids):
+            if vt_orderid:
+                self.add_timing(vt_orderid, OrderTiming(gateway_name, req.vt_symbol, sent))
+        return vt_orderids
+
+    def cancel_order(self, req: CancelRequest, gateway_name: str) -> None:
+        self.mark_cancel(f"{gateway_name}.{req.orderid}", perf_counter())
+        self._cancel_order(req, gateway_name)
+
+    def cancel_orders(self, reqs: Sequence[CancelRequest], gateway_name: str) -> None:
+        now = perf_counter()
+        for req in reqs:
+            self.mark_cancel(f"{gateway_name}.{req.orderid}", now)
+        self._cancel_orders(reqs, gateway_name)
+
+    def add_timing(self, vt_orderid: str, timing: OrderTiming) -> None:
+        self.timings[vt_orderid] = timing
+        if len(self.timings) > MAX_PENDING:
+            self.timings.pop(next(iter(self.timings)), None)
+
+    def mark_cancel(self, vt_orderid: str, now: float) -> None:
+        timing = self.timings.get(vt_orderid, None)
+        if timing and not timing.cancel:
+            timing.cancel = now
+
+    def process_order_event(self, event: Event) -> None:
+        order: OrderData = event.data
+        timing = self.timings.get(order.vt_orderid, None)
+        if not timing or order.status is Status.SUBMITTING:
+            return
+
+        now = getattr(event, "put_time", None) or perf_counter()
+        if not timing.acked:
+            timing.acked = now
+            self.record(SEND_TO_ACK, timing, now - timing.sent)
+
+        if order.traded and not timing.filled:
+            timing.filled = now
+            self.record(ACK_TO_FILL, timing, now - timing.acked)
+
+        if order.status in FINISHED_STATUSES:
+            if timing.cancel and order.status is Status.CANCELLED:
+                self.record(CANCEL_TO_CONFIRM, timing, now - timing.cancel)
+            self.timings.pop(order.vt_orderid, None)
+
+    def record(self, metric: str, timing: OrderTiming, seconds: float) -> None:
+        key = (metric, timing.gateway_name, timing.vt_symbol)
+        with self.lock:
+            histogram = self.histograms.get(key, None)
+            if not histogram:
+                histogram = self.histograms[key] = RollingHistogram(self.window)
+            histogram.record(seconds)
+
+    def get_order_latency(self, metric: str = "", gateway_name: str = "", vt_symbol: str = "") -> dict:
+        # ```
+        # {metric: {gateway_name: {vt_symbol: histogram dict}}} over the
+        # rolling window, optionally filtered
+        # ```
+        result = {}
+        with self.lock:
+            for (key_metric, key_gateway, key_symbol), histogram in self.histograms.items():
+                if metric and key_metric != metric:
+                    continue
+                if gateway_name and key_gateway != gateway_name:
+                    continue
+                if vt_symbol and key_symbol != vt_symbol:
+                    continue
+
+                gateways = result.setdefault(key_metric, {})
+                gateways.setdefault(key_gateway, {})[key_symbol] = histogram.to_dict()
+        return result
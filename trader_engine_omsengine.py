@@ -1,9 +1,41 @@
-from typing import Dict, Optional, List, Any
+import dbm
+import os
+import struct
+from bisect import bisect_right
+from collections import OrderedDict
+from threading import Lock
+from time import time
+from typing import Dict, Optional, List, Any, Callable, Sequence, Tuple
 
-from event_engine import EventEngine, Event
+from event_engine import EVENT_TIMER, EventEngine, Event
+from trader_codec import decode, encode, iter_batch, join_batch
 from trader_engine_base import BaseEngine
-from trader_event import EVENT_TICK, EVENT_TRADE, EVENT_ORDER, EVENT_POSITION, EVENT_ACCOUNT, EVENT_CONTRACT
+from trader_event import (
+    EVENT_TICK, EVENT_TRADE, EVENT_ORDER, EVENT_POSITION, EVENT_ACCOUNT, EVENT_CONTRACT, EVENT_CONTRACTS,
+    EVENT_ORDERS_SYNCED
+)
 from trader_object import TickData, OrderData, TradeData, PositionData, AccountData, ContractData
+from trader_setting import SETTINGS
+from trader_utitlity import get_file_path
+
+EVENT_OMS_CHECKPOINT = "eOmsCheckpoint"
+
+ARCHIVE_ORDER = "order:"
+ARCHIVE_TRADE = "trade:"
+
+# kinds of data with snapshots and change logs
+TICK = "tick"
+ORDER = "order"
+TRADE = "trade"
+POSITION = "position"
+ACCOUNT = "account"
+CONTRACT = "contract"
+ACTIVE_ORDER = "active_order"
+
+CHECKPOINT_KINDS = (CONTRACT, ACTIVE_ORDER, POSITION, ACCOUNT)
+
+CHANGE_LOG_SIZE = 10000
+LAST_KEY = chr(0x10FFFF)
 
 
 class OmsEngine(BaseEngine):
@@ -20,9 +52,62 @@ class OmsEngine(BaseEngine):
 
         self.active_orders: Dict[str, OrderData] = {}
 
+        # ```
+        # Every change bumps version and is appended to the change log of its
+        # kind. Readers on other threads get cached tuple snapshots rebuilt at
+        # most once per change, and can poll changes since a version. Logs
+        # are trimmed by replacing them, so a reader holding the old one
+        # still sees a consistent list. Writers take change_lock, handlers
+        # may run on several worker threads; readers never lock.
+        # ```
+        self.collections: Dict[str, Dict[str, Any]] = {
+            TICK: self.ticks,
+            ORDER: self.orders,
+            TRADE: self.trades,
+            POSITION: self.positions,
+            ACCOUNT: self.accounts,
+            CONTRACT: self.contracts,
+            ACTIVE_ORDER: self.active_orders,
+        }
+        self.version: int = 0
+        self.kind_versions: Dict[str, int] = {kind: 0 for kind in self.collections}
+        self.change_logs: Dict[str, List[Tuple[int, str]]] = {kind: [] for kind in self.collections}
+        self.log_floors: Dict[str, int] = {kind: 0 for kind in self.collections}
+        self.snapshots: Dict[str, Tuple[int, tuple]] = {}
+        self.change_lock: Lock = Lock()
+
+        # secondary indexes, vt_orderid/vt_tradeid keyed dicts per key
+        self.symbol_active_orders: Dict[str, Dict[str, OrderData]] = {}
+        self.gateway_orders: Dict[str, Dict[str, OrderData]] = {}
+        self.reference_orders: Dict[str, Dict[str, OrderData]] = {}
+        self.order_trades: Dict[str, Dict[str, TradeData]] = {}
+
+        # retention of finished orders and trades, oldest first
+        self.finished_orders: OrderedDict = OrderedDict()
+        self.trade_times: OrderedDict = OrderedDict()
+        self.retention_count: int = 0
+        self.retention_age: float = 0
+        self.archive = None
+        self.archive_lock: Lock = Lock()
+
+        self.set_retention(
+            SETTINGS["oms.finished_limit"],
+            SETTINGS["oms.finished_hours"] * 3600,
+            SETTINGS["oms.archive"]
+        )
+
+        # checkpoint of contracts, active orders, positions and accounts
+        self.checkpoint_path: str = ""
+        self.checkpoint_timer: int = 0
+        self.checkpoint_version: int = 0
+        self.restored_orders: Dict[str, OrderData] = {}
+
         self.add_function()
         self.register_event()
 
+        if SETTINGS["oms.checkpoint"]:
+            self.start_checkpoint(SETTINGS["oms.checkpoint"], SETTINGS["oms.checkpoint_interval"])
+
     def add_function(self) -> None:
         # add query function to main engine
         self.main_engine.get_tick = self.get_tick
@@ -38,6 +123,11 @@ class OmsEngine(BaseEngine):
         self.main_engine.get_all_accounts = self.get_all_accounts
         self.main_engine.get_all_contracts = self.get_all_contracts
         self.main_engine.get_all_active_orders = self.get_all_active_orders
+        self.main_engine.get_orders_by_gateway = self.get_orders_by_gateway
+        self.main_engine.get_orders_by_reference = self.get_orders_by_reference
+        self.main_engine.get_trades_by_order = self.get_trades_by_order
+        self.main_engine.get_changes = self.get_changes
+        self.main_engine.get_unconfirmed_orders = self.get_unconfirmed_orders
 
     def register_event(self) -> None:
         self.event_engine.register(EVENT_TICK, self.process_tick_event)
@@ -46,46 +136,91 @@ class OmsEngine(BaseEngine):
         self.event_engine.register(EVENT_POSITION, self.process_position_event)
         self.event_engine.register(EVENT_ACCOUNT, self.process_account_event)
         self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
+        self.event_engine.register(EVENT_CONTRACTS, self.process_contracts_event)
 
     def process_tick_event(self, event: Event) -> None:
         tick: TickData = event.data
         self.ticks[tick.vt_symbol] = tick
+        self.changed(TICK, tick.vt_symbol)
 
     def process_order_event(self, event: Event) -> None:
         order: OrderData = event.data
         self.orders[order.vt_orderid] = order
+        self.changed(ORDER, order.vt_orderid)
+        if self.restored_orders:
+            self.restored_orders.pop(order.vt_orderid, None)
+
+        self.gateway_orders.setdefault(order.gateway_name, {})[order.vt_orderid] = order
+        if order.reference:
+            self.reference_orders.setdefault(order.reference, {})[order.vt_orderid] = order
 
         #         if order is active, update data in dict
         if order.is_active():
             self.active_orders[order.vt_orderid] = order
-        elif order.vt_orderid in self.active_orders:
-            self.active_orders.pop(order.vt_orderid)
+            self.changed(ACTIVE_ORDER, order.vt_orderid)
+            self.symbol_active_orders.setdefault(order.vt_symbol, {})[order.vt_orderid] = order
+        else:
+            if order.vt_orderid in self.active_orders:
+                self.active_orders.pop(order.vt_orderid)
+                self.changed(ACTIVE_ORDER, order.vt_orderid)
+
+                symbol_orders = self.symbol_active_orders.get(order.vt_symbol, None)
+                if symbol_orders is not None:
+                    symbol_orders.pop(order.vt_orderid, None)
+                    if not symbol_orders:
+                        self.symbol_active_orders.pop(order.vt_symbol)
+
+            if self.retention_count or self.retention_age:
+                self.finished_orders.pop(order.vt_orderid, None)
+                self.finished_orders[order.vt_orderid] = time()
+                self.expire(self.finished_orders, self.evict_order)
 
     def process_trade_event(self, event: Event) -> None:
         trade: TradeData = event.data
         self.trades[trade.vt_tradeid] = trade
+        self.changed(TRADE, trade.vt_tradeid)
+        self.order_trades.setdefault(trade.vt_orderid, {})[trade.vt_tradeid] = trade
+
+        if self.retention_count or self.retention_age:
+            self.trade_times[trade.vt_tradeid] = time()
+            self.expire(self.trade_times, self.evict_trade)
 
     def process_position_event(self, event: Event) -> None:
         position: PositionData = event.data
         self.positions[position.vt_postionid] = position
+        self.changed(POSITION, position.vt_postionid)
 
     def process_account_event(self, event: Event) -> None:
         account: AccountData = event.data
         self.accounts[account.vt_accountid] = account
+        self.changed(ACCOUNT, account.vt_accountid)
 
     def process_contract_event(self, event: Event) -> None:
         contract: ContractData = event.data
         self.contracts[contract.vt_symbol] = contract
+        self.changed(CONTRACT, contract.vt_symbol)
+
+    def process_contracts_event(self, event: Event) -> None:
+        contracts: List[ContractData] = event.data
+        for contract in contracts:
+            self.contracts[contract.vt_symbol] = contract
+            self.changed(CONTRACT, contract.vt_symbol)
 
     def get_tick(self, vt_symbol: str) -> Optional[TickData]:
         # get latest tick data from vt_symbol
         return self.ticks.get(vt_symbol, None)
 
     def get_order(self, vt_orderid: str) -> Optional[OrderData]:
-        return self.orders.get(vt_orderid, None)
+        order = self.orders.get(vt_orderid, None)
+        if order is None and self.archive is not None:
+            order = self.load_archived(ARCHIVE_ORDER + vt_orderid)
+        return order
 
     def get_trade(self, vt_tradeid: str) -> Optional[TradeData]:
-        return self.trades.get(vt_tradeid, None)
+        trade = self.trades.get(vt_tradeid, None)
+        if trade is None and self.archive is not None:
+            trade = self.load_archived(ARCHIVE_TRADE + vt_tradeid)
+        return trade
 
     def get_position(self, vt_positionid: str) -> Optional[PositionData]:
         return self.positions.get(vt_positionid, None)
@@ -96,31 +231,286 @@ class OmsEngine(BaseEngine):
     def get_contract(self, vt_symbol: str) -> Optional[ContractData]:
         return self.contracts.get(vt_symbol, None)
 
-    def get_all_ticks(self) -> List[TickData]:
-        return list(self.ticks.values())
+    def get_all_ticks(self) -> Sequence[TickData]:
+        return self.get_snapshot(TICK)
 
-    def get_all_orders(self) -> List[OrderData]:
-        return list(self.orders.values())
+    def get_all_orders(self) -> Sequence[OrderData]:
+        return self.get_snapshot(ORDER)
 
-    def get_all_trades(self) -> List[TradeData]:
-        return list(self.trades.values())
+    def get_all_trades(self) -> Sequence[TradeData]:
+        return self.get_snapshot(TRADE)
 
-    def get_all_positions(self) -> List[PositionData]:
-        return list(self.positions.values())
+    def get_all_positions(self) -> Sequence[PositionData]:
+        return self.get_snapshot(POSITION)
 
-    def get_all_accounts(self) -> List[AccountData]:
-        return list(self.accounts.values())
+    def get_all_accounts(self) -> Sequence[AccountData]:
+        return self.get_snapshot(ACCOUNT)
 
-    def get_all_contracts(self) -> List[ContractData]:
-        return list(self.contracts.values())
+    def get_all_contracts(self) -> Sequence[ContractData]:
+        return self.get_snapshot(CONTRACT)
 
-    def get_all_active_orders(self, vt_symbol: str = "") -> List[OrderData]:
+    def get_all_active_orders(self, vt_symbol: str = "") -> Sequence[OrderData]:
         if not vt_symbol:
-            return list(self.active_orders.values())
+            return self.get_snapshot(ACTIVE_ORDER)
+        else:
+            return list(self.symbol_active_orders.get(vt_symbol, {}).values())
+
+    def get_orders_by_gateway(self, gateway_name: str) -> List[OrderData]:
+        return list(self.gateway_orders.get(gateway_name, {}).values())
+
+    def get_orders_by_reference(self, reference: str) -> List[OrderData]:
+        return list(self.reference_orders.get(reference, {}).values())
+
+    def get_trades_by_order(self, vt_orderid: str) -> List[TradeData]:
+        return list(self.order_trades.get(vt_orderid, {}).values())
+
+    def changed(self, kind: str, key: str) -> None:
+        # logged before the version is published, see get_changes
+        with self.change_lock:
+            version = self.version + 1
+
+            log = self.change_logs[kind]
+            log.append((version, key))
+            if len(log) > CHANGE_LOG_SIZE:
+                kept = log[CHANGE_LOG_SIZE // 2:]
+                self.log_floors[kind] = kept[0][0] - 1
+                self.change_logs[kind] = kept
+
+            self.kind_versions[kind] = version
+            self.version = version
+
+    def get_snapshot(self, kind: str) -> tuple:
+        # ```
+        # Shared read-only tuple of all data of kind, only rebuilt after a
+        # change. Building it from the dict runs without releasing the GIL,
+        # so it is a consistent view even while the event thread writes.
+        # ```
+        version = self.kind_versions[kind]
+        snapshot = self.snapshots.get(kind, None)
+        if snapshot and snapshot[0] == version:
+            return snapshot[1]
+
+        data = tuple(self.collections[kind].values())
+        self.snapshots[kind] = (version, data)
+        return data
+
+    def get_changes(self, kind: str, since: int = 0) -> Tuple[int, List[Tuple[str, Any]]]:
+        # ```
+        # Return (version, [(key, data)] of kind changed after version since),
+        # with data None for a key that was removed. Pass the returned
+        # version next time. If since is older than the retained log, every
+        # current (key, data) is returned and should replace what the caller
+        # holds. The version is read before the log, and every change is
+        # logged before its version is published, so no change at or below
+        # the returned version can be missing from the list.
+        # ```
+        version = self.version
+        log = self.change_logs[kind]
+        collection = self.collections[kind]
+        if since < self.log_floors[kind]:
+            return version, list(tuple(collection.items()))
+
+        entries = log[bisect_right(log, (since, LAST_KEY)):]
+        if entries and entries[-1][0] > version:
+            version = entries[-1][0]
+
+        keys = dict.fromkeys(key for _, key in entries)
+        return version, [(key, collection.get(key, None)) for key in keys]
+
+    def set_retention(self, count: int = 0, age: float = 0, archive: str = "") -> None:
+        # ```
+        # Keep every active order, but only the last count finished orders
+        # and trades and none older than age seconds (0 for no limit). An
+        # evicted order takes its trades with it. Evicted ones go to the
+        # archive file if given, where get_order and get_trade still find
+        # them. Age is also checked on EVENT_TIMER, for quiet sessions.
+        # ```
+        self.retention_count = count
+        self.retention_age = age
+
+        if age:
+            self.event_engine.register(EVENT_TIMER, self.process_timer_event)
         else:
-            active_orders = [
-                order
-                for order in self.active_orders.values()
-                if order.vt_symbol == vt_symbol
-            ]
-            return active_orders
+            self.event_engine.unregister(EVENT_TIMER, self.process_timer_event)
+
+        self.close_archive()
+        if archive:
+            with self.archive_lock:
+                self.archive = dbm.open(str(get_file_path(archive)), "c")
+
+    def process_timer_event(self, event: Event) -> None:
+        self.expire(self.finished_orders, self.evict_order)
+        self.expire(self.trade_times, self.evict_trade)
+
+    def expire(self, times: OrderedDict, evict: Callable[[str], None]) -> None:
+        if self.retention_count:
+            while len(times) > self.retention_count:
+                evict(next(iter(times)))
+
+        if self.retention_age:
+            cutoff = time() - self.retention_age
+            while times and next(iter(times.values())) < cutoff:
+                evict(next(iter(times)))
+
+    def evict_order(self, vt_orderid: str) -> None:
+        self.finished_orders.pop(vt_orderid, None)
+        order = self.orders.pop(vt_orderid, None)
+        if not order:
+            return
+        self.changed(ORDER, vt_orderid)
+
+        self._discard(self.gateway_orders, order.gateway_name, vt_orderid)
+        if order.reference:
+            self._discard(self.reference_orders, order.reference, vt_orderid)
+        for vt_tradeid in list(self.order_trades.pop(vt_orderid, {})):
+            self.evict_trade(vt_tradeid)
+
+        self.archive_data(ARCHIVE_ORDER + vt_orderid, order)
+
+    def evict_trade(self, vt_tradeid: str) -> None:
+        self.trade_times.pop(vt_tradeid, None)
+        trade = self.trades.pop(vt_tradeid, None)
+        if not trade:
+            return
+        self.changed(TRADE, vt_tradeid)
+
+        self._discard(self.order_trades, trade.vt_orderid, vt_tradeid)
+        self.archive_data(ARCHIVE_TRADE + vt_tradeid, trade)
+
+    @staticmethod
+    def _discard(index: Dict[str, Dict[str, Any]], key: str, id: str) -> None:
+        datas = index.get(key, None)
+        if datas is not None:
+            datas.pop(id, None)
+            if not datas:
+                index.pop(key)
+
+    def archive_data(self, key: str, data: Any) -> None:
+        with self.archive_lock:
+            if self.archive is not None:
+                self.archive[key] = encode(data)
+
+    def load_archived(self, key: str) -> Optional[Any]:
+        with self.archive_lock:
+            if self.archive is None:
+                return None
+            try:
+                payload = self.archive[key]
+            except KeyError:
+                return None
+        return decode(payload)
+
+    def close_archive(self) -> None:
+        with self.archive_lock:
+            if self.archive is not None:
+                self.archive.close()
+                self.archive = None
+
+    def start_checkpoint(self, filename: str, interval: float = 60) -> int:
+        # ```
+        # Warm start from the checkpoint file if there is one, then write it
+        # every interval seconds while the OMS state changes. Return the
+        # number of restored records.
+        # ```
+        self.checkpoint_path = str(get_file_path(filename))
+        count = self.load_checkpoint()
+
+        self.event_engine.register(EVENT_ORDERS_SYNCED, self.process_orders_synced_event)
+        self.event_engine.register(EVENT_OMS_CHECKPOINT, self.process_checkpoint_event)
+        self.checkpoint_timer = self.event_engine.add_timer(interval, EVENT_OMS_CHECKPOINT)
+        return count
+
+    def process_checkpoint_event(self, event: Event) -> None:
+        self.save_checkpoint()
+
+    def save_checkpoint(self) -> bool:
+        # write only if the state changed, to a temp file then moved over
+        version = max(self.kind_versions[kind] for kind in CHECKPOINT_KINDS)
+        if not self.checkpoint_path or version == self.checkpoint_version:
+            return False
+
+        # a record the codec can not take is left out, not the whole checkpoint
+        records = []
+        for kind in CHECKPOINT_KINDS:
+            for data in self.get_snapshot(kind):
+                try:
+                    records.append(encode(data))
+                except (struct.error, TypeError, ValueError, KeyError) as e:
+                    self.write_log(f"检查点跳过无法编码的数据：{data}，{e!r}")
+
+        temp_path = self.checkpoint_path + ".tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(join_batch(records))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.checkpoint_path)
+        except OSError as e:
+            self.write_log(f"检查点写入失败：{e!r}")
+            return False
+
+        self.checkpoint_version = version
+        return True
+
+    def load_checkpoint(self) -> int:
+        # ```
+        # Restore the state saved by save_checkpoint. Restored active orders
+        # are not made active again: they wait in restored_orders, listed by
+        # get_unconfirmed_orders, until the gateway pushes them after
+        # connect. Those it has not pushed by its EVENT_ORDERS_SYNCED were
+        # finished while we were down and are dropped. They are not written
+        # to later checkpoints either way. An unreadable checkpoint, e.g.
+        # truncated or written by another codec version, is logged and
+        # nothing is restored.
+        # ```
+        if not os.path.exists(self.checkpoint_path):
+            return 0
+
+        processors = {
+            ContractData: (EVENT_CONTRACT, self.process_contract_event),
+            PositionData: (EVENT_POSITION, self.process_position_event),
+            AccountData: (EVENT_ACCOUNT, self.process_account_event),
+        }
+        try:
+            with open(self.checkpoint_path, "rb") as f:
+                payload = f.read()
+            records = list(iter_batch(payload))
+            for data in records:
+                if not isinstance(data, OrderData):
+                    processors[data.__class__]
+        except (OSError, ValueError, struct.error, KeyError) as e:
+            self.write_log(f"检查点无法读取，冷启动：{e!r}")
+            return 0
+
+        for data in records:
+            if isinstance(data, OrderData):
+                self.restored_orders[data.vt_orderid] = data
+            else:
+                event_type, processor = processors[data.__class__]
+                processor(Event(event_type, data))
+
+        self.checkpoint_version = max(self.kind_versions[kind] for kind in CHECKPOINT_KINDS)
+        return len(records)
+
+    def process_orders_synced_event(self, event: Event) -> None:
+        gateway_name: str = event.data
+        for order in list(self.restored_orders.values()):
+            if order.gateway_name == gateway_name:
+                self.restored_orders.pop(order.vt_orderid, None)
+                self.write_log(f"恢复的委托未被确认，已移除：{order.vt_orderid}")
+
+    def get_unconfirmed_orders(self) -> List[OrderData]:
+        return list(self.restored_orders.values())
+
+    def write_log(self, msg: str) -> None:
+        write_log = getattr(self.main_engine, "write_log", None)
+        if write_log:
+            write_log(msg, "OMS")
+
+    def close(self) -> None:
+        if self.checkpoint_timer:
+            self.event_engine.cancel_timer(self.checkpoint_timer)
+            self.checkpoint_timer = 0
+            self.save_checkpoint()
+
+        self.close_archive()
@@ -0,0 +1,199 @@
+from threading import Lock
+from typing import Any, Dict, List, Optional, Set
+
+from event_engine import Event, EventEngine
+from trader_constant import Direction, Exchange
+from trader_engine_base import BaseEngine
+from trader_event import EVENT_CONTRACT, EVENT_CONTRACTS, EVENT_POSITION, EVENT_TICK, EVENT_TRADE
+from trader_object import ContractData, PositionData, TickData, TradeData
+
+EVENT_POSITION_PUBLISH = "ePositionPublish"
+
+PUBLISH_INTERVAL = 0.5
+
+
+class NetPosition:
+    # ```
+    # Net position of one vt_symbol built from fills: signed volume, average
+    # cost, realized pnl of the closed part and unrealized pnl at the last
+    # price. Every update is O(1), trade history is never rescanned. Pnl
+    # is kept in price points and multiplied by size when read, so a size
+    # learnt after the first trades applies to them too.
+    # ```
+    __slots__ = (
+        "gateway_name", "symbol", "exchange", "vt_symbol", "size",
+        "volume", "price", "realized", "last_price"
+    )
+
+    def __init__(self, gateway_name: str, symbol: str, exchange: Exchange, vt_symbol: str, size: float = 1):
+        self.gateway_name: str = gateway_name
+        self.symbol: str = symbol
+        self.exchange: Exchange = exchange
+        self.vt_symbol: str = vt_symbol
+        self.size: float = size
+
+        self.volume: float = 0
+        self.price: float = 0
+        self.realized: float = 0
+        self.last_price: float = 0
+
+    def update_trade(self, trade: TradeData) -> None:
+        if not trade.volume:
+            return
+        volume = trade.volume if trade.direction == Direction.LONG else -trade.volume
+        current = self.volume
+
+        if not current or (current > 0) == (volume > 0):
+            # open or add: weighted average cost
+            self.price = (self.price * abs(current) + trade.price * abs(volume)) / abs(current + volume)
+            self.volume = current + volume
+        else:
+            closed = min(abs(volume), abs(current))
+            direction = 1 if current > 0 else -1
+            self.realized += closed * (trade.price - self.price) * direction
+
+            self.volume = current + volume
+            if not self.volume:
+                self.price = 0
+            elif (self.volume > 0) != (current > 0):
+                # flipped, the remainder was opened at the trade price
+                self.price = trade.price
+
+        if not self.last_price:
+            self.last_price = trade.price
+
+    @property
+    def realized_pnl(self) -> float:
+        return self.realized * self.size
+
+    @property
+    def unrealized_pnl(self) -> float:
+        if not self.volume or not self.last_price:
+            return 0
+        return (self.last_price - self.price) * self.volume * self.size
+
+    def to_position(self) -> PositionData:
+        return PositionData(
+            gateway_name=self.gateway_name,
+            symbol=self.symbol,
+            exchange=self.exchange,
+            direction=Direction.NET,
+            volume=self.volume,
+            price=self.price,
+            pnl=self.unrealized_pnl
+        )
+
+
+class PositionEngine(BaseEngine):
+    # ```
+    # Keeps net positions and pnl from EVENT_TRADE and EVENT_TICK, for
+    # gateways that do not push PositionData. Changed positions are
+    # published as EVENT_POSITION at most every publish_interval seconds.
+    # Sizes follow EVENT_CONTRACT, contracts may arrive after the trades.
+    # A symbol's first trade continues from the NET position the OMS holds,
+    # e.g. restored from its checkpoint, realized pnl starts from zero.
+    # The changed set is swapped under a lock, handlers may run on several
+    # worker threads.
+    # ```
+    def __init__(self, main_engine: Any, event_engine: EventEngine, publish_interval: float = PUBLISH_INTERVAL):
+        super(PositionEngine, self).__init__(main_engine=main_engine, event_engine=event_engine,
+                                             engine_name="position")
+
+        self.positions: Dict[str, NetPosition] = {}
+        self.changed: Set[str] = set()
+        self.changed_lock: Lock = Lock()
+        self.publish_timer: int = 0
+
+        self.add_function()
+        self.register_event()
+        self.publish_timer = self.event_engine.add_timer(publish_interval, EVENT_POSITION_PUBLISH)
+
+    def add_function(self) -> None:
+        self.main_engine.get_net_position = self.get_net_position
+        self.main_engine.get_all_net_positions = self.get_all_net_positions
+
+    def register_event(self) -> None:
+        self.event_engine.register(EVENT_TRADE, self.process_trade_event)
+        self.event_engine.register(EVENT_TICK, self.process_tick_event)
+        self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
+        self.event_engine.register(EVENT_CONTRACTS, self.process_contracts_event)
+        self.event_engine.register(EVENT_POSITION_PUBLISH, self.process_publish_event)
+
+    def process_trade_event(self, event: Event) -> None:
+        trade: TradeData = event.data
+        position = self.positions.get(trade.vt_symbol, None)
+        if not position:
+            position = self.positions[trade.vt_symbol] = NetPosition(
+                trade.gateway_name,
+                trade.symbol,
+                trade.exchange,
+                trade.vt_symbol,
+                self.get_size(trade.vt_symbol)
+            )
+            self.seed(position)
+
+        position.update_trade(trade)
+        self.mark_changed(trade.vt_symbol)
+
+    def process_tick_event(self, event: Event) -> None:
+        tick: TickData = event.data
+        position = self.positions.get(tick.vt_symbol, None)
+        if position and tick.last_price != position.last_price:
+            position.last_price = tick.last_price
+            if position.volume:
+                self.mark_changed(tick.vt_symbol)
+
+    def process_contract_event(self, event: Event) -> None:
+        self.update_size(event.data)
+
+    def process_contracts_event(self, event: Event) -> None:
+        for contract in event.data:
+            self.update_size(contract)
+
+    def update_size(self, contract: ContractData) -> None:
+        position = self.positions.get(contract.vt_symbol, None)
+        if position and contract.size and contract.size != position.size:
+            position.size = contract.size
+            self.mark_changed(contract.vt_symbol)
+
+    def mark_changed(self, vt_symbol: str) -> None:
+        with self.changed_lock:
+            self.changed.add(vt_symbol)
+
+    def process_publish_event(self, event: Event) -> None:
+        if not self.changed:
+            return
+
+        with self.changed_lock:
+            changed, self.changed = self.changed, set()
+        for vt_symbol in changed:
+            position = self.positions[vt_symbol].to_position()
+            self.event_engine.put(Event(EVENT_POSITION + vt_symbol, position, internal=True))
+
+    def seed(self, position: NetPosition) -> None:
+        get_position = getattr(self.main_engine, "get_position", None)
+        data: Optional[PositionData] = (
+            get_position(f"{position.vt_symbol}.{Direction.NET.value}") if get_position else None
+        )
+        if data:
+            position.volume = data.volume
+            position.price = data.price
+
+    def get_size(self, vt_symbol: str) -> float:
+        # contract multiplier, 1 while the contract is not known yet
+        get_contract = getattr(self.main_engine, "get_contract", None)
+        contract: Optional[ContractData] = get_contract(vt_symbol) if get_contract else None
+        if contract and contract.size:
+            return contract.size
+        return 1
+
+    def get_net_position(self, vt_symbol: str) -> Optional[NetPosition]:
+        return self.positions.get(vt_symbol, None)
+
+    def get_all_net_positions(self) -> List[NetPosition]:
+        return list(self.positions.values())
+
+    def close(self) -> None:
+        if self.publish_timer:
+            self.event_engine.cancel_timer(self.publish_timer)
+            self.publish_timer = 0
@@ -1,5 +1,7 @@
 import sys
 
+from event_engine import EVENT_TIMER, EventPriority
+
 print(sys.path)
 
 EVENT_TICK = "eTick."
@@ -8,4 +10,20 @@ EVENT_ORDER = "eOrder."
 EVENT_POSITION = "ePosition."
 EVENT_ACCOUNT = "eAccount."
 EVENT_CONTRACT = "eContract."
+# a list of contracts in one event, e.g. the whole symbol list of a gateway
+EVENT_CONTRACTS = "eContracts"
 EVENT_LOG = "eLog"
+# data is the gateway_name, put once its open orders were all pushed after connect
+EVENT_ORDERS_SYNCED = "eOrdersSynced"
+
+# dispatch lanes used by MainEngine: order state first, ticks behind
+# account updates, logs and timer last
+EVENT_PRIORITIES = {
+    EVENT_ORDER: EventPriority.CRITICAL,
+    EVENT_TRADE: EventPriority.CRITICAL,
+    EVENT_ACCOUNT: EventPriority.HIGH,
+    EVENT_POSITION: EventPriority.HIGH,
+    EVENT_TICK: EventPriority.NORMAL,
+    EVENT_LOG: EventPriority.LOW,
+    EVENT_TIMER: EventPriority.LOW,
+}
@@ -9,7 +9,9 @@ from trader_event import (
     EVENT_POSITION,
     EVENT_ACCOUNT,
     EVENT_CONTRACT,
+    EVENT_CONTRACTS,
     EVENT_LOG,
+    EVENT_ORDERS_SYNCED,
 )
 from trader_object import (
     TickData,
@@ -41,25 +43,22 @@ class BaseGateway(ABC):
         event = Event(type, data)
         self.event_engine.put(event)
 
-    def on_tick(self, tick: TickData) -> None:
+    # one event per update: handlers registered for the EVENT_TICK prefix
+    # and for EVENT_TICK + vt_symbol are both matched by the event engine
 
-        self.on_event(EVENT_TICK, tick)
+    def on_tick(self, tick: TickData) -> None:
         self.on_event(EVENT_TICK + tick.vt_symbol, tick)
 
     def on_trade(self, trade: TradeData) -> None:
-        self.on_event(EVENT_TRADE, trade)
         self.on_event(EVENT_TRADE + trade.vt_symbol, trade)
 
     def on_order(self, order: OrderData) -> None:
-        self.on_event(EVENT_ORDER, order)
         self.on_event(EVENT_ORDER + order.vt_orderid, order)
 
     def on_position(self, position: PositionData) -> None:
-        self.on_event(EVENT_POSITION, position)
         self.on_event(EVENT_POSITION + position.vt_symbol, position)
 
     def on_account(self, account: AccountData) -> None:
-        self.on_event(EVENT_ACCOUNT, account)
         self.on_event(EVENT_ACCOUNT + account.vt_accountid, account)
 
     def on_log(self, log: LogData) -> None:
@@ -68,6 +67,13 @@ class BaseGateway(ABC):
     def on_contract(self, contract: ContractData) -> None:
         self.on_event(EVENT_CONTRACT, contract)
 
+    def on_contracts(self, contracts: List[ContractData]) -> None:
+        self.on_event(EVENT_CONTRACTS, contracts)
+
+    def on_orders_synced(self) -> None:
+        # every open order at the exchange was pushed with on_order
+        self.on_event(EVENT_ORDERS_SYNCED, self.gateway_name)
+
     def write_log(self, msg: str) -> None:
         log = LogData(gateway_name=self.gateway_name, msg=msg)
         self.on_log(log)
@@ -1,17 +1,116 @@
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, fields
 from datetime import datetime
 from logging import INFO
+from threading import Lock
+from typing import Dict, List
 
 from trader_constant import Direction, Exchange, Interval, Offset, Status, Product, OptionType, OrderType
 
 ACTIVE_STATUSES = set([Status.SUBMITTING, Status.NOTTRADED, Status.PARTTRADED])
 
 
+class SymbolRegistry:
+    # ```
+    # Hands out one interned vt_symbol string per (symbol, exchange) and a
+    # small integer id for it. Data objects built for the same symbol then
+    # share the string, whose hash is computed once, instead of formatting
+    # a new one every time.
+    # ```
+    def __init__(self):
+        # keyed by exchange._value_, plain attribute access is much cheaper
+        # than hashing the enum member or going through Exchange.value
+        self._vt_symbols: Dict[str, Dict[str, str]] = {}
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lock: Lock = Lock()
+
+    def get_vt_symbol(self, symbol: str, exchange: Exchange) -> str:
+        symbols = self._vt_symbols.get(exchange._value_, None)
+        if symbols:
+            vt_symbol = symbols.get(symbol, None)
+            if vt_symbol:
+                return vt_symbol
+        return self._register(symbol, exchange)
+
+    def _register(self, symbol: str, exchange: Exchange) -> str:
+        with self._lock:
+            symbols = self._vt_symbols.setdefault(exchange._value_, {})
+            vt_symbol = symbols.get(symbol, None)
+            if vt_symbol:
+                return vt_symbol
+
+            vt_symbol = sys.intern(f"{symbol}.{exchange.value}")
+            if vt_symbol not in self._ids:
+                self._ids[vt_symbol] = len(self._names)
+                self._names.append(vt_symbol)
+
+            symbols[symbol] = vt_symbol
+            return vt_symbol
+
+    def get_symbol_id(self, vt_symbol: str) -> int:
+        # -1 if the vt_symbol has never been registered
+        return self._ids.get(vt_symbol, -1)
+
+    def get_vt_symbol_by_id(self, symbol_id: int) -> str:
+        if symbol_id < 0:
+            raise IndexError(f"unknown symbol id {symbol_id}")
+        return self._names[symbol_id]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+symbol_registry = SymbolRegistry()
+get_vt_symbol = symbol_registry.get_vt_symbol
+get_symbol_id = symbol_registry.get_symbol_id
+
+
+def slotted(*extra: str):
+    # ```
+    # Rebuild a dataclass with __slots__ for its fields plus the extra
+    # attributes set in __post_init__, so instances carry no __dict__.
+    # Works like dataclass(slots=True), which needs python 3.10.
+    # ```
+    def wrap(cls):
+        inherited = set()
+        for base in cls.__mro__[1:]:
+            inherited.update(getattr(base, "__slots__", ()))
+
+        names = [f.name for f in fields(cls)] + list(extra)
+        slots = tuple(name for name in names if name not in inherited)
+
+        cls_dict = dict(cls.__dict__)
+        for name in slots:
+            cls_dict.pop(name, None)
+        cls_dict.pop("__dict__", None)
+        cls_dict.pop("__weakref__", None)
+        cls_dict["__slots__"] = slots
+
+        new_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+        new_cls.__copy__ = _copy_slots(new_cls, names)
+        return new_cls
+    return wrap
+
+
+def _copy_slots(cls, names):
+    # generated straight-line copy, faster than copy's generic slot handling
+    lines = ["def __copy__(self):", "    new = _new(_cls)"]
+    lines += [f"    new.{name} = self.{name}" for name in names]
+    lines.append("    return new")
+
+    namespace = {"_new": object.__new__, "_cls": cls}
+    exec("\n".join(lines), namespace)
+    return namespace["__copy__"]
+
+
+@slotted()
 @dataclass
 class BaseData:
     gateway_name: str
 
 
+@slotted("vt_symbol")
 @dataclass
 class TickData(BaseData):
     symbol: str
@@ -56,9 +155,10 @@ class TickData(BaseData):
     ask_volume_5: float = 0
 
     def __post_init__(self):
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
 
 
+@slotted("vt_symbol")
 @dataclass
 class BarData(BaseData):
     symbol: str
@@ -74,9 +174,10 @@ class BarData(BaseData):
     close_price: float = 0
 
     def __post_init__(self):
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
 
 
+@slotted("vt_symbol", "vt_orderid")
 @dataclass
 class OrderData(BaseData):
     symbol: str
@@ -94,7 +195,7 @@ class OrderData(BaseData):
     reference: str = ""
 
     def __post_init__(self):
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
         self.vt_orderid = f"{self.gateway_name}.{self.orderid}"
 
     def is_active(self) -> bool:
@@ -110,6 +211,7 @@ class OrderData(BaseData):
         return req
 
 
+@slotted("vt_symbol", "vt_orderid", "vt_tradeid")
 @dataclass
 class TradeData(BaseData):
     symbol: str
@@ -124,7 +226,7 @@ class TradeData(BaseData):
     datetime: datetime = None
 
     def __post_init__(self):
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
         self.vt_orderid = f"{self.gateway_name}.{self.orderid}"
         self.vt_tradeid = f"{self.gateway_name}.{self.tradeid}"
 
@@ -142,7 +244,7 @@ class PositionData(BaseData):
     yd_volume: float = 0
 
     def __post_init__(self):
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
         self.vt_postionid = f"{self.vt_symbol}.{self.direction.value}"
 
 
@@ -189,7 +291,7 @@ class ContractData(BaseData):
     option_index: str = ""
 
     def __post_init__(self):
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
 
 
 @dataclass
@@ -198,7 +300,7 @@ class SubscribeRequest:
     exchange: Exchange
 
     def __post_init__(self):
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
 
 
 @dataclass
@@ -213,7 +315,7 @@ class OrderRequest:
     reference: str = ""
 
     def __post_init__(self):
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
 
     def create_order_data(self, orderid: str, gateway_name: str) -> OrderData:
         order = OrderData(
@@ -238,7 +340,7 @@ class CancelRequest:
     exchange: Exchange
 
     def __post_init__(self):
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
 
 
 @dataclass
@@ -250,4 +352,4 @@ class HistoryRequest:
     interval: Interval = None
 
     def __post_init__(self):
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
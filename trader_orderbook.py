@@ -0,0 +1,159 @@
+from bisect import bisect_left
+from datetime import datetime
+from math import inf
+from typing import Iterable, List, Tuple
+
+from trader_constant import Exchange
+from trader_object import TickData, get_vt_symbol
+
+TICK_LEVELS = 5
+
+BID_FIELDS = tuple((f"bid_price_{n}", f"bid_volume_{n}") for n in range(1, TICK_LEVELS + 1))
+ASK_FIELDS = tuple((f"ask_price_{n}", f"ask_volume_{n}") for n in range(1, TICK_LEVELS + 1))
+
+LevelType = Tuple[float, float]
+
+
+class BookSide:
+    # ```
+    # One side of the book as two parallel lists sorted best price first.
+    # Bid prices are kept negated so both sides sort ascending and a price
+    # level is found with one bisect. Levels past depth are dropped and
+    # limit remembers the worst price kept: nothing beyond it is known, so
+    # a diff there is ignored and after deletions near the top the side
+    # holds fewer levels until the next snapshot.
+    # ```
+    def __init__(self, depth: int, descending: bool):
+        self.depth: int = depth
+        self.sign: int = -1 if descending else 1
+        self.keys: List[float] = []
+        self.volumes: List[float] = []
+        self.limit: float = inf
+
+    def update(self, price: float, volume: float) -> None:
+        # set the volume of a price level, a volume of 0 removes it
+        keys = self.keys
+        key = price * self.sign
+        i = bisect_left(keys, key)
+
+        if i < len(keys) and keys[i] == key:
+            if volume:
+                self.volumes[i] = volume
+            else:
+                del keys[i]
+                del self.volumes[i]
+        elif volume and key < self.limit:
+            keys.insert(i, key)
+            self.volumes.insert(i, volume)
+            if len(keys) > self.depth:
+                keys.pop()
+                self.volumes.pop()
+                self.limit = keys[-1]
+
+    def replace(self, levels: Iterable[LevelType]) -> None:
+        sign = self.sign
+        levels = sorted((price * sign, volume) for price, volume in levels if volume)
+        if len(levels) > self.depth:
+            levels = levels[:self.depth]
+            self.limit = levels[-1][0]
+        else:
+            self.limit = inf
+
+        self.keys = [key for key, _ in levels]
+        self.volumes = [volume for _, volume in levels]
+
+    def clear(self) -> None:
+        self.keys = []
+        self.volumes = []
+        self.limit = inf
+
+    def price(self, n: int = 0) -> float:
+        if n < len(self.keys):
+            return self.keys[n] * self.sign
+        return 0
+
+    def volume(self, n: int = 0) -> float:
+        if n < len(self.volumes):
+            return self.volumes[n]
+        return 0
+
+    def levels(self, count: int = 0) -> List[LevelType]:
+        count = count or len(self.keys)
+        sign = self.sign
+        return [(key * sign, volume) for key, volume in zip(self.keys[:count], self.volumes[:count])]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class OrderBook:
+    # ```
+    # Market depth of one symbol up to depth levels per side, kept up to
+    # date from full snapshots or incremental diffs. update_tick projects
+    # the top five levels onto a TickData for existing consumers.
+    # ```
+    def __init__(self, symbol: str, exchange: Exchange, gateway_name: str, depth: int = 20):
+        self.symbol: str = symbol
+        self.exchange: Exchange = exchange
+        self.vt_symbol: str = get_vt_symbol(symbol, exchange)
+        self.gateway_name: str = gateway_name
+        self.depth: int = depth
+
+        self.bids: BookSide = BookSide(depth, descending=True)
+        self.asks: BookSide = BookSide(depth, descending=False)
+        self.datetime: datetime = None
+
+    def apply_snapshot(self, bids: Iterable[LevelType], asks: Iterable[LevelType], dt: datetime = None) -> None:
+        self.bids.replace(bids)
+        self.asks.replace(asks)
+        self.datetime = dt
+
+    def apply_diff(self, bids: Iterable[LevelType], asks: Iterable[LevelType], dt: datetime = None) -> None:
+        for price, volume in bids:
+            self.bids.update(price, volume)
+        for price, volume in asks:
+            self.asks.update(price, volume)
+        self.datetime = dt
+
+    def clear(self) -> None:
+        self.bids.clear()
+        self.asks.clear()
+
+    def spread(self) -> float:
+        if not self.bids or not self.asks:
+            return 0
+        return self.asks.price() - self.bids.price()
+
+    def mid_price(self) -> float:
+        if not self.bids or not self.asks:
+            return 0
+        return (self.asks.price() + self.bids.price()) / 2
+
+    def update_tick(self, tick: TickData) -> TickData:
+        # copy the top levels into tick, empty levels are zeroed
+        for side, names in ((self.bids, BID_FIELDS), (self.asks, ASK_FIELDS)):
+            keys = side.keys
+            volumes = side.volumes
+            sign = side.sign
+            count = len(keys)
+
+            for n, (price_name, volume_name) in enumerate(names):
+                if n < count:
+                    setattr(tick, price_name, keys[n] * sign)
+                    setattr(tick, volume_name, volumes[n])
+                else:
+                    setattr(tick, price_name, 0)
+                    setattr(tick, volume_name, 0)
+
+        if self.datetime:
+            tick.datetime = self.datetime
+        return tick
+
+    def to_tick(self) -> TickData:
+        tick = TickData(
+            gateway_name=self.gateway_name,
+            symbol=self.symbol,
+            exchange=self.exchange,
+            datetime=self.datetime
+        )
+        return self.update_tick(tick)
@@ -14,6 +14,12 @@ SETTINGS: Dict[str, Any] = {
     "email.password": "hellobixia",
     "email.server": "smtp.qq.com",
     "email.port": 465,
+    "oms.finished_limit": 0,
+    "oms.finished_hours": 0,
+    "oms.archive": "",
+    "oms.checkpoint": "",
+    "oms.checkpoint_interval": 60,
+    "bus.name": "fengxia",
     "database.timezone": "Asia/Shanghai",
     "database": "sqlite",
     "user": "",